@@ -0,0 +1,56 @@
+import sys, os; sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path else None
+import tempfile
+import time
+import jsonpickle
+from common.codec import StudentCodec
+from common.models import Database, Student
+from common.roster_generator import generate_records
+
+# usage: python benchmarks/codec_benchmark.py [sizes...]   (default 10000 100000 999999)
+# student ids are 6 digits, so 999,999 is the largest roster the system can hold
+
+
+def make_students(count: int) -> list[Student]:
+    return [Student.from_record(record) for record in generate_records(count, seed=count)]
+
+
+def timed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def bench_jsonpickle(students: list[Student], file_name: str) -> tuple[float, float]:
+    def save():
+        with open(file_name, 'w') as file:
+            file.write(jsonpickle.encode(students))
+
+    def load():
+        with open(file_name, 'r') as file:
+            jsonpickle.decode(file.read())
+    return timed(save), timed(load)
+
+
+def bench_codec(students: list[Student], file_name: str) -> tuple[float, float]:
+    def save():
+        with open(file_name, 'w', encoding='utf-8') as file:
+            StudentCodec.write_file(file, [StudentCodec.encode(student.to_record()) for student in students])
+
+    def load():
+        Database(file_name)
+    return timed(save), timed(load)
+
+
+def main(sizes: list[int]) -> None:
+    directory = tempfile.mkdtemp()
+    print(f"{'students':>10} {'codec':>10} {'save s':>8} {'load s':>8} {'save/s':>12} {'load/s':>12}")
+    for size in sizes:
+        students = make_students(size)
+        for name, bench in (("jsonpickle", bench_jsonpickle), ("jsonl", bench_codec)):
+            file_name = os.path.join(directory, f"{name}-{size}.data")
+            save, load = bench(students, file_name)
+            print(f"{size:>10} {name:>10} {save:>8.2f} {load:>8.2f} {size / save:>12,.0f} {size / load:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 999_999])
@@ -0,0 +1,96 @@
+import sys, os; sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path else None
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common.flush_policy import FlushPolicy
+from common.models import Database
+from common.passwords import PasswordHasher
+from common.roster_generator import write_roster
+from common.services import AdminOperationsLogic, LoginService, StudentOperationsService
+
+# usage: python benchmarks/concurrency_stress.py [students] [threads] [operations] [log2 scrypt n]
+# Runs logins, enrollments, drops, removals and admin reports against one
+# concurrent Database from a thread pool, then checks every index still agrees
+# with the roster. Exits non-zero on any error or inconsistency. Nearly every
+# operation logs in, so the scrypt cost defaults to n = 2**4 rather than the
+# production PasswordHasher.N; the run exercises the locking, not the KDF.
+
+
+def check_consistency(db: Database) -> list[str]:
+    problems = []
+    if len(db.students) != len(db._students_by_id):
+        problems.append(f"{len(db.students)} students but {len(db._students_by_id)} indexed by id")
+    for student in db.students:
+        if db._students_by_id.get(student.id) is not student:
+            problems.append(f"{student.id} missing from the id index")
+        if db._students_by_email.get(student.email) is not student:
+            problems.append(f"{student.email} missing from the email index")
+        if len(student.subjects) > student.MAX_SUBJECTS:
+            problems.append(f"{student.id} holds {len(student.subjects)} subjects")
+        if len({subject.id for subject in student.subjects}) != len(student.subjects):
+            problems.append(f"{student.id} is enrolled twice in one subject")
+        marks = [subject.mark for subject in student.subjects]
+        if marks and abs(student.overall_mark - sum(marks) / len(marks)) > 1e-9:
+            problems.append(f"{student.id} has a stale overall mark")
+    graded = [student for student in db.students if student.overall_grade is not None]
+    if sum(db.grade_histogram().values()) != len(graded):
+        problems.append("grade histogram does not match the graded students")
+    if graded and abs(db.cohort_mean_mark() - sum(student.overall_mark for student in graded) / len(graded)) > 1e-6:
+        problems.append("cohort mean does not match the graded students")
+    for student in graded:
+        if student.overall_grade != db.grading.grade(student.overall_mark):
+            problems.append(f"{student.id} has a stale grade")
+    return problems
+
+
+def main(student_count: int, threads: int, operations: int, kdf_cost: int) -> int:
+    PasswordHasher.N = 2 ** kdf_cost
+    file_name = os.path.join(tempfile.mkdtemp(), "students.data")
+    write_roster(file_name, student_count, seed=1)
+    db = Database(file_name, flush_policy=FlushPolicy.EVERY_N_MUTATIONS(500), concurrent=True)
+    credentials = [(student.email, student._password) for student in db.students]
+    login_service = LoginService(db)
+    admin = AdminOperationsLogic(db)
+    counts = {"login": 0, "enroll": 0, "drop": 0, "remove": 0, "report": 0}
+
+    def operation(seed: int) -> str:
+        rng = random.Random(seed)
+        email, password = rng.choice(credentials)
+        kind = rng.choices(("login", "enroll", "drop", "remove", "report"), weights=(50, 25, 15, 2, 8))[0]
+        if kind == "report":
+            admin.group_students_by_grade()
+            admin.partition_students()
+            admin.cohort_mean_mark()
+            return kind
+        result = login_service.login_student(email, password)
+        if kind == "login" or not result.success:
+            return "login"
+        student = result.data
+        if kind == "enroll":
+            StudentOperationsService(student, db).enroll_in_subject()
+        elif kind == "drop" and student.subjects:
+            StudentOperationsService(student, db).drop_subject(rng.choice(student.subjects).id)
+        elif kind == "remove":
+            admin.remove_student(student.id)
+        return kind
+
+    # switch threads far more often than the default 5ms so races surface quickly
+    sys.setswitchinterval(1e-6)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for kind in pool.map(operation, range(operations)):
+            counts[kind] += 1
+    elapsed = time.perf_counter() - start
+    db.close()
+    problems = check_consistency(db) + check_consistency(Database(file_name))
+    print(f"{operations} operations on {threads} threads in {elapsed:.2f}s ({operations / elapsed:,.0f}/s): {counts}")
+    for problem in problems[:20]:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [10_000, 16, 50_000, 4]
+    sys.exit(main(*(args + defaults[len(args):])))
@@ -0,0 +1,75 @@
+import sys, os; sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path else None
+import http.client
+import json
+import random
+import secrets
+import tempfile
+import threading
+import time
+from common.flush_policy import FlushPolicy
+from common.models import Database
+from common.roster_generator import write_roster
+from server.main import StudentServer
+
+# usage: python benchmarks/http_load.py [students] [clients] [requests per client]
+# Starts the HTTP server on a free localhost port over a synthetic roster and has
+# each client send logins, token-authenticated enrollments and report requests
+# over one keep-alive connection, then prints the server's per-endpoint latency report.
+
+
+ADMIN_TOKEN = secrets.token_urlsafe()
+
+
+def client(port: int, credentials: list[tuple[str, str]], requests: int, seed: int) -> None:
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    tokens: dict[str, str] = {}
+    for _ in range(requests):
+        email, password = rng.choice(credentials)
+        kind = rng.choices(("/login", "/enroll", "/admin/summary"), weights=(40, 50, 10))[0]
+        if kind == "/enroll" and tokens:
+            token = tokens[rng.choice(list(tokens))]
+            connection.request("POST", kind, headers={"Authorization": f"Bearer {token}"})
+            connection.getresponse().read()
+        elif kind == "/admin/summary":
+            connection.request("GET", kind, headers={"Authorization": f"Bearer {ADMIN_TOKEN}"})
+            connection.getresponse().read()
+        else:
+            connection.request("POST", "/login", body=json.dumps({"email": email, "password": password}),
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            body = json.loads(response.read())
+            if response.status == 200:
+                tokens[email] = body["token"]
+    connection.close()
+
+
+def main(student_count: int, clients: int, requests: int) -> None:
+    file_name = os.path.join(tempfile.mkdtemp(), "students.data")
+    write_roster(file_name, student_count, seed=1)
+    db = Database(file_name, flush_policy=FlushPolicy.EVERY_T_MILLISECONDS(100), concurrent=True)
+    credentials = [(student.email, student._password) for student in db.students]
+    server = StudentServer(("127.0.0.1", 0), db, ADMIN_TOKEN)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threads = [threading.Thread(target=client, args=(server.server_port, credentials, requests, seed))
+               for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    db.close()
+    total = clients * requests
+    print(f"{total} requests from {clients} keep-alive clients in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+    print(f"{'endpoint':<24} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, stats in sorted(server.latency.snapshot().items()):
+        print(f"{endpoint:<24} {stats['count']:>8} {stats['mean_ms']:>9} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [10_000, 8, 500]
+    main(*(args + defaults[len(args):]))
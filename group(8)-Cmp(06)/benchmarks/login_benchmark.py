@@ -0,0 +1,79 @@
+import sys, os; sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path else None
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common.flush_policy import FlushPolicy
+from common.models import Database
+from common.passwords import PasswordHasher
+from common.roster_generator import write_roster
+from common.services import AdminOperationsLogic, LoginService
+
+# usage: python benchmarks/login_benchmark.py [students] [logins per run] [thread counts...]
+# Logs in against hashed passwords from 1, cores and 2 x cores client threads and
+# prints logins per second in total and per core. A probe thread keeps reading
+# admin reports meanwhile; its latency shows whether the KDF work stalls the
+# other sessions sharing the database.
+
+
+def probe(admin: AdminOperationsLogic, stop: threading.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        admin.cohort_mean_mark()
+        admin.group_students_by_grade()
+        samples.append(time.perf_counter() - start)
+        time.sleep(0.001)
+
+
+def run(db: Database, credentials: list[tuple[str, str]], threads: int, logins: int) -> tuple[float, list[float]]:
+    login_service = LoginService(db)
+    admin = AdminOperationsLogic(db)
+    stop, samples = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(admin, stop, samples))
+    prober.start()
+
+    def login(seed: int) -> bool:
+        email, password = random.Random(seed).choice(credentials)
+        return login_service.login_student(email, password).success
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        failed = sum(not success for success in pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    if failed:
+        raise RuntimeError(f"{failed} logins failed")
+    return logins / elapsed, sorted(samples)
+
+
+def main(student_count: int, logins: int, thread_counts: list[int]) -> None:
+    file_name = os.path.join(tempfile.mkdtemp(), "students.data")
+    write_roster(file_name, student_count, seed=1)
+    db = Database(file_name, flush_policy=FlushPolicy.EVERY_T_MILLISECONDS(100), concurrent=True)
+    students = db.students
+    credentials = [(student.email, student._password) for student in students]
+    # hash the roster up front so every run measures verification, not the one-off upgrade
+    start = time.perf_counter()
+    hashes = PasswordHasher.hash_many([password for _, password in credentials])
+    with db.writing():
+        for student, password_hash in zip(students, hashes):
+            student.set_password_hash(password_hash)
+        db.commit()
+    cores = PasswordHasher.WORKERS
+    print(f"hashed {len(students)} passwords on {cores} KDF workers in {time.perf_counter() - start:.2f}s "
+          f"(scrypt n={PasswordHasher.N} r={PasswordHasher.R} p={PasswordHasher.P})")
+    print(f"{'threads':>8} {'logins/s':>10} {'per core':>10} {'probe p50 ms':>13} {'probe p99 ms':>13}")
+    for threads in thread_counts or sorted({1, cores, 2 * cores}):
+        rate, samples = run(db, credentials, threads, logins)
+        p50 = 1000 * samples[len(samples) // 2] if samples else 0.0
+        p99 = 1000 * samples[min(len(samples) - 1, int(0.99 * len(samples)))] if samples else 0.0
+        print(f"{threads:>8} {rate:>10.1f} {rate / min(threads, cores):>10.1f} {p50:>13.3f} {p99:>13.3f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [1_000, 200]
+    main(*(args[:2] + defaults[len(args[:2]):]), args[2:])
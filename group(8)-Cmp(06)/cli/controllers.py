@@ -88,13 +88,14 @@ class AdminSubSystem(IController):
         try:
             ui = UI(depth)
             choice = ui.menu("Admin System (c/g/p/r/s/x): ")
+            self.db.refresh()
             if choice == "c":
                 ui.info("Clearing students database")
                 answer = ui.crit(
                     "Are you sure you want to clear the database (Y)ES/(N)O: ")
                 if answer == "y":
                     self.db.clear()
-                    self.db.save()
+                    self.db.commit()
                     ui.info("Student data cleared")
 
             elif choice == "g":
@@ -207,7 +208,12 @@ class RegisterController(IController):
                     while (name := ui.prompt("Name: ").strip()) == '':
                         ui.error("Please provide a name for the student")
                     ui.info(f"Enrolling Student {name}")
-                    self.register_service.register_student(name, email, password)
+                    register_result = self.register_service.register_student(name, email, password)
+                    if register_result.status == ResultStatus.STUDENT_ALREADY_EXISTS:
+                        student = cast(Student, register_result.data)
+                        ui.error(register_result.status.value, student.name)
+                    elif not register_result.success:
+                        ui.error(register_result.status.value)
                     break
                 else:
                     if result.status == ResultStatus.STUDENT_ALREADY_EXISTS:
@@ -277,7 +283,7 @@ class StudentCourseController(IController):
                 if subject_count > 0:
                     ui.info(f"Showing {subject_count} subjects")
                     for subject in self.student.subjects:
-                        ui.data(str(subject))
+                        ui.data(subject.describe(self.student.subject_grade(subject)))
                 else:
                     ui.info("Showing 0 subjects")
             else:
@@ -10,7 +10,7 @@ import os
 
 
 def main():
-    db = Database()
+    db = Database(shared=True)
     navigation_stack: List[NavigationNode] = [NavigationNode(0, NodeAddType.APPEND,  UniversitySystem(
         db, AdminOperationsLogic(db), LoginService(db), RegisterService(db)))]  
     try:
@@ -31,6 +31,8 @@ def main():
         ui.info("Exiting...")
     except Exception as e:
         ui.error(f"An unexpected error occurred: {e}")
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
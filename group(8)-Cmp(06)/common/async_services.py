@@ -0,0 +1,106 @@
+import asyncio
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from common.models import Database, Student
+from common.operation_result import OperationResult
+from common.services import AdminOperationsLogic, LoginService, RegisterService, StudentOperationsService
+
+
+# Async counterparts of the services: each call runs the synchronous service,
+# saves included, on a worker thread so the event loop is never blocked and many
+# operations can be in flight at once. A Database opened with concurrent=True is
+# driven from the loop's default thread pool; any other database gets one worker
+# thread of its own, so it is still only ever touched by a single thread.
+_serial_executors: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def executor_for(db: Database) -> Executor:
+    if db._rw_lock is not None:
+        return None
+    executor = _serial_executors.get(db)
+    if executor is None:
+        executor = _serial_executors[db] = ThreadPoolExecutor(1, thread_name_prefix="unisys-db")
+        weakref.finalize(db, executor.shutdown, wait=False)
+    return executor
+
+
+async def run_with(db: Database, function, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(executor_for(db), partial(function, *args, **kwargs))
+
+
+class AsyncStudentOperationsService:
+    def __init__(self, student: Student, db: Database):
+        self.service = StudentOperationsService(student, db)
+        self.db = db
+
+    async def change_password(self, password, confirm_password) -> OperationResult:
+        return await run_with(self.db, self.service.change_password, password, confirm_password)
+
+    async def enroll_in_subject(self) -> OperationResult:
+        return await run_with(self.db, self.service.enroll_in_subject)
+
+    async def drop_subject(self, subject_id) -> OperationResult:
+        return await run_with(self.db, self.service.drop_subject, subject_id)
+
+
+class AsyncRegisterService:
+    def __init__(self, db: Database):
+        self.service = RegisterService(db)
+        self.db = db
+
+    async def ensure_student_doesnot_exist(self, email, password) -> OperationResult:
+        return await run_with(self.db, self.service.ensure_student_doesnot_exist, email, password)
+
+    async def register_student(self, name, email, password) -> OperationResult:
+        return await run_with(self.db, self.service.register_student, name, email, password)
+
+    async def import_students(self, file_name: str, chunk_size: int = 1000) -> tuple[int, list[tuple[int, OperationResult]]]:
+        return await run_with(self.db, self.service.import_students, file_name, chunk_size)
+
+
+class AsyncLoginService:
+    def __init__(self, db: Database):
+        self.service = LoginService(db)
+        self.db = db
+
+    async def login_student(self, email, password) -> OperationResult:
+        return await run_with(self.db, self.service.login_student, email, password)
+
+
+class AsyncAdminOperationsLogic:
+    def __init__(self, db: Database):
+        self.service = AdminOperationsLogic(db)
+        self.db = db
+
+    async def group_students_by_grade(self) -> dict[str, list]:
+        return await run_with(self.db, self.service.group_students_by_grade)
+
+    async def partition_students(self) -> dict:
+        return await run_with(self.db, self.service.partition_students)
+
+    async def count_students_by_grade(self) -> dict[str, int]:
+        return await run_with(self.db, self.service.count_students_by_grade)
+
+    async def cohort_mean_mark(self) -> float:
+        return await run_with(self.db, self.service.cohort_mean_mark)
+
+    async def pass_rate(self) -> float:
+        return await run_with(self.db, self.service.pass_rate)
+
+    async def regrade(self, cutoffs: tuple, pass_mark: float = None, dry_run: bool = False) -> dict[tuple[str, str], int]:
+        return await run_with(self.db, self.service.regrade, cutoffs, pass_mark, dry_run)
+
+    async def enroll_students(self, enrollments: dict[str, int]) -> dict[str, list[OperationResult]]:
+        return await run_with(self.db, self.service.enroll_students, enrollments)
+
+    async def export_students(self, file_name: str) -> int:
+        return await run_with(self.db, self.service.export_students, file_name)
+
+    async def remove_student(self, student_id) -> OperationResult:
+        return await run_with(self.db, self.service.remove_student, student_id)
+
+
+# flushes pending mutations and stops any background writer without blocking the loop
+async def close_database(db: Database) -> None:
+    await run_with(db, db.close)
@@ -0,0 +1,61 @@
+import threading
+from typing import Callable
+
+
+# Single writer thread fed with immutable snapshots. Only the newest pending
+# snapshot is kept: a snapshot superseded before the thread picks it up is
+# never written, since the later one already contains its changes.
+class BackgroundWriter:
+    def __init__(self, write: Callable[[object], None], name: str = "database-writer") -> None:
+        self._write = write
+        self._condition = threading.Condition()
+        self._pending: tuple[int, object] = None
+        self._submitted = 0
+        self._written = 0
+        self._error: Exception = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot: object) -> int:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Background writer is closed")
+            self._submitted += 1
+            self._pending = (self._submitted, snapshot)
+            self._condition.notify_all()
+            return self._submitted
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                generation, snapshot = self._pending
+                self._pending = None
+            error = None
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                error = e
+            with self._condition:
+                self._written = generation
+                self._error = error or self._error
+                self._condition.notify_all()
+
+    # blocks until everything submitted so far is on disk; re-raises a failed write
+    def wait(self, timeout: float = None) -> bool:
+        with self._condition:
+            target = self._submitted
+            done = self._condition.wait_for(lambda: self._written >= target, timeout)
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            return done
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
@@ -0,0 +1,95 @@
+import argparse
+import csv
+import json
+import os
+from itertools import islice
+from common.models import Student
+
+
+# Streaming readers and writers for rosters exchanged with other systems. Imports
+# are CSV (header: name,email,password) or JSON Lines ({"name", "email", "password"}),
+# chosen by file extension; rows are yielded one at a time so files of any size
+# are read in constant memory.
+IMPORT_FIELDS = ("name", "email", "password")
+EXPORT_FIELDS = ("id", "name", "email", "overall_mark", "overall_grade", "subjects")
+
+
+def file_format(file_name: str) -> str:
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".json"):
+        return "jsonl"
+    raise ValueError(f"{file_name}: expected a .csv or .jsonl file")
+
+
+# yields (row number, row) pairs; row is None when the row cannot be parsed
+def read_rows(file_name: str):
+    with open(file_name, 'r', encoding='utf-8', newline='') as file:
+        if file_format(file_name) == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def read_chunks(file_name: str, chunk_size: int):
+    rows = read_rows(file_name)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def export_row(student: Student) -> dict:
+    return {"id": student.id, "name": student.name, "email": student.email,
+            "overall_mark": round(student.overall_mark, 2) if student.overall_mark is not None else None,
+            "overall_grade": student.overall_grade,
+            "subjects": [[subject.id, subject.mark] for subject in student.subjects]}
+
+
+# writes one row per student as it is produced; returns the number of rows written
+def export_students(students, file_name: str) -> int:
+    count = 0
+    with open(file_name, 'w', encoding='utf-8', newline='') as file:
+        if file_format(file_name) == "csv":
+            writer = csv.writer(file)
+            writer.writerow(EXPORT_FIELDS)
+            for student in students:
+                row = export_row(student)
+                row["subjects"] = " ".join(f"{id}:{mark}" for id, mark in row["subjects"])
+                writer.writerow(row[field] for field in EXPORT_FIELDS)
+                count += 1
+        else:
+            for student in students:
+                file.write(json.dumps(export_row(student), separators=(',', ':'), ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    from common.models import Database
+    from common.services import AdminOperationsLogic, RegisterService
+    parser = argparse.ArgumentParser(description="Bulk import or export students")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file", help=".csv or .jsonl file")
+    parser.add_argument("--db", default="students.data")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    db = Database(args.db, shared=True)
+    try:
+        if args.command == "import":
+            imported, failures = RegisterService(db).import_students(args.file, args.chunk_size)
+            for row_number, result in failures:
+                print(f"row {row_number}: {result.status.value.format(result.data)}")
+            print(f"{imported} students imported, {len(failures)} rows rejected")
+        else:
+            print(f"{AdminOperationsLogic(db).export_students(args.file)} students written to {args.file}")
+    finally:
+        db.close()
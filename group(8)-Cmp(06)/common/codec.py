@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import sys
+import jsonpickle
+
+
+# students.data layout: one header line, then one compact JSON array per student
+#   ["id", "name", "email", "password", [["subject id", mark], ...]]
+# Records are plain tuples so the codec does not depend on the model classes.
+class StudentCodec:
+    FORMAT = "unisys-students"
+    VERSION = 1
+    HEADER = json.dumps({"format": FORMAT, "version": VERSION}, separators=(',', ':')) + "\n"
+
+    _encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+    _decode = json.JSONDecoder().decode
+
+    @staticmethod
+    def encode(record: tuple) -> str:
+        return StudentCodec._encoder.encode(record) + "\n"
+
+    @staticmethod
+    def decode(line: str) -> tuple:
+        return StudentCodec._decode(line)
+
+    @staticmethod
+    def is_header(line: str) -> bool:
+        return line.startswith('{"format":"' + StudentCodec.FORMAT + '"')
+
+    # yields (record, line) pairs; line is None for records read from a legacy file.
+    # Lines always end in a newline, so callers can cache and concatenate them as is.
+    @staticmethod
+    def read_file(file_name: str):
+        with open(file_name, 'r', encoding='utf-8') as file:
+            first_line = file.readline()
+            if StudentCodec.is_header(first_line):
+                for line in file:
+                    if line.strip():
+                        yield StudentCodec.decode(line), line if line.endswith("\n") else line + "\n"
+                return
+            data = first_line + file.read()
+        for record in StudentCodec.read_legacy(data):
+            yield record, None
+
+    @staticmethod
+    def write_file(file, lines) -> None:
+        file.write(StudentCodec.HEADER)
+        file.writelines(lines)
+
+    # write to a temporary file and rename it over the old one, so a crash never leaves a torn file
+    @staticmethod
+    def write_atomically(file_name: str, lines) -> None:
+        temp_name = file_name + ".tmp"
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            StudentCodec.write_file(file, lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, file_name)
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(os.path.dirname(os.path.abspath(file_name)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    # jsonpickle students.data, including hand-edited entries whose subjects lost their py/object tag
+    @staticmethod
+    def read_legacy(data: str) -> list[tuple]:
+        records = []
+        for student in jsonpickle.decode(data):
+            # files pickled through Student.__setstate__ come back with subjects keyed by id
+            subjects = student._subjects.values() if isinstance(student._subjects, dict) else student._subjects
+            subjects = [[subject["id"], subject["_mark"]] if isinstance(subject, dict) else [subject.id, subject._mark]
+                        for subject in subjects]
+            records.append((student.id, student._name, student._email, student._password, subjects))
+        return records
+
+
+# one-shot conversion of a jsonpickle students.data; the original is kept as <file>.jsonpickle
+def migrate(file_name: str) -> bool:
+    with open(file_name, 'r', encoding='utf-8') as file:
+        if StudentCodec.is_header(file.readline()):
+            return False
+    lines = [StudentCodec.encode(record) for record, _ in StudentCodec.read_file(file_name)]
+    shutil.copyfile(file_name, file_name + ".jsonpickle")
+    StudentCodec.write_atomically(file_name, lines)
+    return True
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or ["students.data"]:
+        print(f"{name}: {'migrated' if migrate(name) else 'already in ' + StudentCodec.FORMAT + ' format'}")
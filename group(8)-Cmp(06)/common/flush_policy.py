@@ -0,0 +1,31 @@
+from enum import Enum
+
+
+class FlushMode(Enum):
+    IMMEDIATE = 1
+    EVERY_N_MUTATIONS = 2
+    EVERY_T_MILLISECONDS = 3
+    ON_SHUTDOWN = 4
+
+
+class FlushPolicy:
+    def __init__(self, mode: FlushMode, mutations: int = 1, milliseconds: int = 0) -> None:
+        self.mode = mode
+        self.mutations = mutations
+        self.milliseconds = milliseconds
+
+    @staticmethod
+    def IMMEDIATE():
+        return FlushPolicy(FlushMode.IMMEDIATE)
+
+    @staticmethod
+    def EVERY_N_MUTATIONS(mutations: int):
+        return FlushPolicy(FlushMode.EVERY_N_MUTATIONS, mutations=mutations)
+
+    @staticmethod
+    def EVERY_T_MILLISECONDS(milliseconds: int):
+        return FlushPolicy(FlushMode.EVERY_T_MILLISECONDS, milliseconds=milliseconds)
+
+    @staticmethod
+    def ON_SHUTDOWN():
+        return FlushPolicy(FlushMode.ON_SHUTDOWN)
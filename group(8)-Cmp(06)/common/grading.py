@@ -0,0 +1,46 @@
+import bisect
+import json
+import os
+from common.utils import Utils
+
+
+# Grade cutoffs and pass mark one database grades its students against. A regrade
+# replaces the database's scheme and saves it next to the data file as
+# <file>.grading, so the new grades survive a restart without touching the marks.
+class GradingScheme:
+    PASS_MARK = 50
+
+    def __init__(self, cutoffs: tuple = Utils.GRADE_CUTOFFS, pass_mark: float = PASS_MARK) -> None:
+        self.cutoffs = Utils._checked_cutoffs(cutoffs)
+        self.pass_mark = pass_mark
+        self._ascending = self.cutoffs[::-1]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, GradingScheme) and (self.cutoffs, self.pass_mark) == (other.cutoffs, other.pass_mark)
+
+    def grade(self, mark: float) -> str:
+        if mark is not None:
+            return Utils.GRADES[len(self.cutoffs) - bisect.bisect_right(self._ascending, mark)]
+
+    def grades(self, marks: list[float]) -> list[str]:
+        return Utils.calculate_grades(marks, self.cutoffs)
+
+    def passes(self, mark: float) -> bool:
+        return mark >= self.pass_mark
+
+    def save(self, file_name: str) -> None:
+        temp_name = file_name + ".tmp"
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            json.dump({"cutoffs": list(self.cutoffs), "pass_mark": self.pass_mark}, file)
+        os.replace(temp_name, file_name)
+
+    @staticmethod
+    def load(file_name: str) -> 'GradingScheme':
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return GradingScheme(tuple(data["cutoffs"]), data["pass_mark"])
+
+
+GradingScheme.DEFAULT = GradingScheme()
@@ -0,0 +1,108 @@
+import math
+import os
+import random
+import struct
+from array import array
+
+
+class IdSpaceExhausted(Exception):
+    pass
+
+
+# Hands out ids from 1..capacity in the order of an affine permutation
+# (multiplier * k + offset) mod capacity, skipping ids already taken. The
+# cursor only moves forward, so every id is inspected at most once over the
+# allocator's lifetime and allocation is amortised O(1). Released ids are
+# reused once the permutation has been walked to its end.
+class IdAllocator:
+    MAGIC = b"UIDS"
+    HEADER = struct.Struct("<4sIIIII")
+
+    def __init__(self, capacity: int = 999999, randomize: bool = True) -> None:
+        self.capacity = capacity
+        self.count = 0
+        self._used = bytearray((capacity + 8) // 8)
+        self._released = array('I')
+        self._cursor = 0
+        self._multiplier = 1
+        self._offset = 0
+        if randomize:
+            rng = random.SystemRandom()
+            self._offset = rng.randrange(capacity)
+            self._multiplier = rng.randrange(capacity // 3, capacity)
+            while math.gcd(self._multiplier, capacity) != 1:
+                self._multiplier += 1
+        self.dirty = True
+
+    def is_used(self, id: int) -> bool:
+        return bool(self._used[id >> 3] & (1 << (id & 7)))
+
+    def reserve(self, id: int) -> None:
+        if not self.is_used(id):
+            self._used[id >> 3] |= 1 << (id & 7)
+            self.count += 1
+            self.dirty = True
+
+    def release(self, id: int) -> None:
+        if self.is_used(id):
+            self._used[id >> 3] &= ~(1 << (id & 7))
+            self.count -= 1
+            self._released.append(id)
+            self.dirty = True
+
+    def allocate(self) -> int:
+        while self._cursor < self.capacity:
+            id = (self._multiplier * self._cursor + self._offset) % self.capacity + 1
+            self._cursor += 1
+            if not self.is_used(id):
+                self.reserve(id)
+                return id
+        while self._released:
+            id = self._released.pop()
+            if not self.is_used(id):
+                self.reserve(id)
+                return id
+        raise IdSpaceExhausted(f"All {self.capacity} ids are in use")
+
+    # as many ids as are free, up to count
+    def allocate_many(self, count: int) -> list[int]:
+        ids = []
+        try:
+            while len(ids) < count:
+                ids.append(self.allocate())
+        except IdSpaceExhausted:
+            pass
+        return ids
+
+    def save(self, file_name: str) -> None:
+        temp_name = file_name + ".tmp"
+        with open(temp_name, 'wb') as file:
+            file.write(IdAllocator.HEADER.pack(IdAllocator.MAGIC, self.capacity, self._multiplier,
+                                               self._offset, self._cursor, self.count))
+            file.write(self._used)
+            self._released.tofile(file)
+        os.replace(temp_name, file_name)
+        self.dirty = False
+
+    @staticmethod
+    def load(file_name: str) -> 'IdAllocator':
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name, 'rb') as file:
+            data = file.read()
+        header_size = IdAllocator.HEADER.size
+        if len(data) < header_size:
+            return None
+        magic, capacity, multiplier, offset, cursor, count = IdAllocator.HEADER.unpack_from(data)
+        bitmap_size = (capacity + 8) // 8
+        if magic != IdAllocator.MAGIC or len(data) < header_size + bitmap_size:
+            return None
+        allocator = IdAllocator(capacity, randomize=False)
+        allocator._multiplier = multiplier
+        allocator._offset = offset
+        allocator._cursor = cursor
+        allocator.count = count
+        allocator._used = bytearray(data[header_size:header_size + bitmap_size])
+        allocator._released.frombytes(data[header_size + bitmap_size:])
+        allocator.dirty = False
+        return allocator
@@ -0,0 +1,53 @@
+import json
+import os
+
+
+class Journal:
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+        self._pending: list[dict] = []
+        self.record_count: int = 0
+
+    def record(self, op: str, **data) -> None:
+        self._pending.append({"op": op, **data})
+
+    # append the pending records to the journal file and make them durable
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with open(self.file_name, 'a') as file:
+            file.writelines(json.dumps(record, separators=(',', ':')) + "\n" for record in pending)
+            file.flush()
+            os.fsync(file.fileno())
+        self.record_count += len(pending)
+
+    # a torn last line left by a crash mid-append is cut off the file, so the next
+    # flush does not glue its first record onto the fragment
+    def replay(self) -> list[dict]:
+        if not os.path.exists(self.file_name):
+            return []
+        records = []
+        complete = 0
+        with open(self.file_name, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                complete += len(line)
+            torn = file.seek(0, os.SEEK_END) > complete
+        if torn:
+            with open(self.file_name, 'r+b') as file:
+                file.truncate(complete)
+                file.flush()
+                os.fsync(file.fileno())
+        self.record_count = len(records)
+        return records
+
+    def truncate(self) -> None:
+        with open(self.file_name, 'w'):
+            pass
+        self.record_count = 0
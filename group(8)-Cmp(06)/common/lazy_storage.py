@@ -0,0 +1,182 @@
+import json
+import os
+import re
+import weakref
+from collections import OrderedDict
+from common.codec import StudentCodec, migrate
+from common.id_allocator import IdAllocator
+from common.models import Database, ScanningReportsMixin, Student
+
+
+# Opening only records where each student's line starts and the email it holds;
+# Student objects are decoded on first use and kept in a bounded LRU. Changed
+# and newly registered students are pinned in memory until the next save.
+class LazyDatabase(ScanningReportsMixin, Database):
+    # id, name and email are the first three fields of a codec line
+    LINE_PREFIX = re.compile(rb'\["((?:[^"\\]|\\.)*)","(?:[^"\\]|\\.)*","((?:[^"\\]|\\.)*)"')
+
+    def __init__(self, file_name: str = "students.data", cache_size: int = 10_000, randomize_ids: bool = True) -> None:
+        self.cache_size = cache_size
+        super().__init__(file_name, randomize_ids=randomize_ids)
+
+    def _load(self) -> None:
+        # offsets need the line-per-student layout, so a jsonpickle file is migrated once
+        migrate(self.FILE_NAME)
+        self._reset_state()
+        self._offsets: dict[str, tuple[int, int]] = {}
+        self._ids_by_email: dict[str, str] = {}
+        self._hydrated: OrderedDict[str, Student] = OrderedDict()
+        self._live: weakref.WeakValueDictionary[str, Student] = weakref.WeakValueDictionary()
+        self._pinned: dict[str, Student] = {}
+        self._removed: set[str] = set()
+        with open(self.FILE_NAME, 'rb') as file:
+            offset = len(file.readline())
+            for line in file:
+                match = LazyDatabase.LINE_PREFIX.match(line)
+                if match:
+                    id, email = (self._unescape(group) for group in match.groups())
+                    self._offsets[id] = (offset, len(line))
+                    self._ids_by_email.setdefault(email, id)
+                offset += len(line)
+        self._verify_id_allocator(list(self._offsets))
+
+    @staticmethod
+    def _unescape(value: bytes) -> str:
+        text = value.decode('utf-8')
+        return json.loads(f'"{text}"') if '\\' in text else text
+
+    def _read_line(self, file, id: str) -> str:
+        offset, length = self._offsets[id]
+        file.seek(offset)
+        return file.read(length).decode('utf-8')
+
+    def _hydrate(self, id: str) -> Student:
+        student = self._pinned.get(id) or self._live.get(id)
+        if student is None:
+            with open(self.FILE_NAME, 'rb') as file:
+                student = Student.from_record(StudentCodec.decode(self._read_line(file, id)))
+            student._observer = self
+            self._live[id] = student
+        self._hydrated[id] = student
+        self._hydrated.move_to_end(id)
+        while len(self._hydrated) > self.cache_size:
+            self._hydrated.popitem(last=False)
+        return student
+
+    # a full scan reads the file once, front to back, and leaves the LRU to point lookups
+    @property
+    def students(self) -> list[Student]:
+        students = []
+        position = None
+        with open(self.FILE_NAME, 'rb') as file:
+            for id, (offset, length) in self._offsets.items():
+                student = self._pinned.get(id) or self._live.get(id)
+                if student is None:
+                    if offset != position:
+                        file.seek(offset)
+                    student = Student.from_record(StudentCodec.decode(file.read(length).decode('utf-8')))
+                    position = offset + length
+                    student._observer = self
+                    self._live[id] = student
+                students.append(student)
+        return students + [student for id, student in self._pinned.items() if id not in self._offsets]
+
+    @students.setter
+    def students(self, value: list[Student]) -> None:
+        pass
+
+    def hydrated_count(self) -> int:
+        return len(self._hydrated)
+
+    def student_changed(self, student: Student, op: str, **data) -> None:
+        self._pinned[student.id] = student
+        self._dirty.add(student.id)
+
+    def find_student_by_id(self, id: str) -> Student:
+        if id in self._pinned:
+            return self._pinned[id]
+        return self._hydrate(id) if id in self._offsets else None
+
+    def find_student_by_email(self, email: str) -> Student:
+        id = self._ids_by_email.get(email)
+        return self.find_student_by_id(id) if id is not None else None
+
+    def register_student(self, id: str, name: str, email: str, password: str) -> Student:
+        student = Student(id, name, email, password)
+        student._observer = self
+        self._pinned[id] = student
+        self._ids_by_email.setdefault(email, id)
+        self._id_allocator.reserve(int(id))
+        self._dirty.add(id)
+        return student
+
+    def remove_student(self, id: str) -> bool:
+        student = self.find_student_by_id(id)
+        if student == None:
+            return False
+        student._observer = None
+        if self._ids_by_email.get(student.email) == id:
+            del self._ids_by_email[student.email]
+        self._pinned.pop(id, None)
+        self._hydrated.pop(id, None)
+        self._live.pop(id, None)
+        self._dirty.discard(id)
+        if self._offsets.pop(id, None) is not None:
+            self._removed.add(id)
+        self._id_allocator.release(int(id))
+        self._notify_removed(id)
+        return True
+
+    def clear(self) -> None:
+        for student in list(self._live.values()) + list(self._pinned.values()):
+            student._observer = None
+        self._removed.update(self._offsets)
+        self._offsets.clear()
+        self._ids_by_email.clear()
+        self._hydrated.clear()
+        self._live = weakref.WeakValueDictionary()
+        self._pinned.clear()
+        self._dirty.clear()
+        self._id_allocator = IdAllocator(randomize=self._randomize_ids)
+        self._notify_cleared()
+
+    # clean records are copied from the old file as raw bytes; only pinned students are encoded
+    def save(self) -> None:
+        if self._id_allocator.dirty:
+            self._id_allocator.save(self.FILE_NAME + ".ids")
+        if not self._dirty and not self._removed:
+            return
+        self.last_save_encoded = 0
+        self.last_save_reused = 0
+        dirty, self._dirty = self._dirty, set()
+        offsets: dict[str, tuple[int, int]] = {}
+        temp_name = self.FILE_NAME + ".tmp"
+        with open(self.FILE_NAME, 'rb') as source, open(temp_name, 'wb') as target:
+            target.write(StudentCodec.HEADER.encode('utf-8'))
+            ids = list(self._offsets) + [id for id in self._pinned if id not in self._offsets]
+            for id in ids:
+                if id in dirty:
+                    line = StudentCodec.encode(self._pinned[id].to_record()).encode('utf-8')
+                    self.last_save_encoded += 1
+                else:
+                    offset, length = self._offsets[id]
+                    source.seek(offset)
+                    line = source.read(length)
+                    if not line.endswith(b"\n"):
+                        # the last record of a hand-written file may lack its newline
+                        line += b"\n"
+                    self.last_save_reused += 1
+                offsets[id] = (target.tell(), len(line))
+                target.write(line)
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_name, self.FILE_NAME)
+        self._offsets = offsets
+        self._removed.clear()
+        for id in dirty:
+            student = self._pinned.pop(id, None)
+            if student is not None:
+                self._live[id] = student
+
+    def checkpoint(self) -> None:
+        self.save()
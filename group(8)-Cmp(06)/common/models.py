@@ -1,20 +1,48 @@
 import random
 import os
-import jsonpickle
+import sys
+import threading
+from contextlib import nullcontext
+from common.background_writer import BackgroundWriter
+from common.codec import StudentCodec
+from common.file_lock import FileLock
+from common.id_allocator import IdAllocator, IdSpaceExhausted
+from common.flush_policy import FlushMode, FlushPolicy
+from common.grading import GradingScheme
+from common.journal import Journal
+from common.passwords import PasswordHasher
+from common.rw_lock import ReadWriteLock
 from common.utils import Utils
 
 
 class Subject:
-    def __init__(self, id: str) -> None:
-        self.id = id
-        self._generate_mark()
+    __slots__ = ("id", "_mark")
+
+    def __init__(self, id: str, mark: int = None) -> None:
+        # subject ids repeat across students, so share one string per id
+        self.id = sys.intern(id)
+        if mark is None:
+            self._generate_mark()
+        else:
+            self._mark = mark
 
     def _generate_mark(self) -> None:
         self._mark = random.randint(25, 100)
-        self._grade = Utils.calculate_grade(self.mark)
 
     def __str__(self) -> str:
-        return f"[ Subject::{self.id} -- mark = {self.mark} -- grade = {self.grade.rjust(3)}]"
+        return self.describe(self.grade)
+
+    # grades depend on the database's scheme, so callers showing a student's subjects
+    # pass Student.subject_grade(subject) rather than relying on the default cutoffs
+    def describe(self, grade: str) -> str:
+        return f"[ Subject::{self.id} -- mark = {self.mark} -- grade = {grade.rjust(3)}]"
+
+    def __getstate__(self) -> dict:
+        return {"id": self.id, "_mark": self._mark}
+
+    def __setstate__(self, state: dict) -> None:
+        self.id = sys.intern(state["id"])
+        self._mark = state["_mark"]
 
     @property
     def mark(self):
@@ -22,22 +50,97 @@ class Subject:
 
     @property
     def grade(self):
-        return self._grade
+        return Utils.calculate_grade(self._mark)
+
+    # legacy students.data files still carry the derived grade; accept and drop it
+    @property
+    def _grade(self):
+        return self.grade
+
+    @_grade.setter
+    def _grade(self, value) -> None:
+        pass
+
+
+# Walks the subject ids 001..999 in the order of an affine permutation from a random
+# starting point, so every student draws its ids in a different order and each id
+# is inspected at most once per walk; enrolling never redraws. Ids a student drops
+# are handed out again once the walk has been completed.
+class SubjectIdCursor:
+    ID_SPACE = 999
+    # coprime with ID_SPACE, so the walk visits every id exactly once
+    MULTIPLIER = 610
+
+    __slots__ = ("_start", "_step", "_released")
+
+    def __init__(self) -> None:
+        self._start = random.randrange(SubjectIdCursor.ID_SPACE)
+        self._step = 0
+        self._released: list[str] = []
+
+    def next_id(self, held: dict[str, Subject]) -> str:
+        while self._step < SubjectIdCursor.ID_SPACE:
+            number = SubjectIdCursor.MULTIPLIER * (self._start + self._step) % SubjectIdCursor.ID_SPACE + 1
+            self._step += 1
+            id = str(number).zfill(3)
+            if id not in held:
+                return id
+        while self._released:
+            id = self._released.pop()
+            if id not in held:
+                return id
+        raise IdSpaceExhausted(f"All {SubjectIdCursor.ID_SPACE} subject ids are in use")
+
+    def release(self, id: str) -> None:
+        self._released.append(id)
 
 
 class Student:
-    MIN_PASS_MARK = 50
     MAX_SUBJECTS = 4
+    PERSISTED_FIELDS = ("id", "_name", "_email", "_password", "_subjects", "overall_mark", "overall_grade")
+
+    # overall_grade is derived from overall_mark under the owning database's grading scheme
+    # _subjects maps subject id -> Subject in enrolment order
+    __slots__ = ("id", "_name", "_email", "_password", "_subjects", "overall_mark",
+                 "_subject_ids", "_mark_total", "_observer", "__weakref__")
 
-    
     def __init__(self, id: str, name: str, email: str, password: str) -> None:
         self.id = id
         self._name: str = name
         self._email: str = email
         self._password: str = password
-        self._subjects: list[Subject] = []
+        self._subjects: dict[str, Subject] = {}
+        self._subject_ids: SubjectIdCursor = None
+        self._mark_total: int = 0
         self.overall_mark: float = None
-        self.overall_grade:  str = None
+        self._observer: 'Database' = None
+
+    def __getstate__(self) -> dict:
+        state = {field: getattr(self, field) for field in Student.PERSISTED_FIELDS}
+        state["_subjects"] = self.subjects
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        for field, value in state.items():
+            if field != "_subjects":
+                setattr(self, field, value)
+        self._subject_ids = None
+        self._observer = None
+        self._set_subjects(state["_subjects"])
+
+    def to_record(self) -> tuple:
+        return (self.id, self._name, self._email, self._password, [[subject.id, subject.mark] for subject in self._subjects.values()])
+
+    @staticmethod
+    def from_record(record: tuple) -> 'Student':
+        id, name, email, password, subjects = record
+        student = Student(id, name, email, password)
+        student._set_subjects([Subject(subject_id, mark) for subject_id, mark in subjects])
+        return student
+
+    def _update_from_record(self, record: tuple) -> None:
+        _, self._name, self._email, self._password, subjects = record
+        self._set_subjects([Subject(subject_id, mark) for subject_id, mark in subjects])
 
     def __str__(self) -> str:
         return f"{self._name}".ljust(25) + " :: " + f"{self.id}".rjust(6) + " --> " + "EMAIL: " + f"{self.email}".rjust(30)
@@ -57,93 +160,575 @@ class Student:
 
     @property
     def subjects(self) -> list[Subject]:
-        return self._subjects
+        return list(self._subjects.values())
+
+    @property
+    def overall_grade(self) -> str:
+        return self._grading().grade(self.overall_mark)
+
+    # legacy students.data files still carry the derived grade; accept and drop it
+    @overall_grade.setter
+    def overall_grade(self, value) -> None:
+        pass
+
+    def _grading(self) -> GradingScheme:
+        return self._observer.grading if self._observer is not None else GradingScheme.DEFAULT
+
+    def subject_grade(self, subject: Subject) -> str:
+        return self._grading().grade(subject.mark)
 
     def can_enroll_subject(self) -> bool:
-        return len(self._subjects) < Student.MAX_SUBJECTS
+        return len(self._subjects) < min(Student.MAX_SUBJECTS, SubjectIdCursor.ID_SPACE)
 
     def enroll_in_subject(self, subject: Subject) -> Subject:
-        self._subjects.append(subject)
+        self._subjects[subject.id] = subject
+        self._mark_total += subject._mark
         self.overall_mark = self._calculate_average_mark()
-        self.overall_grade = Utils.calculate_grade(self.overall_mark)
+        self._notify("enroll", subject=subject.id, mark=subject.mark)
         return subject
 
     def find_enrolled_subject(self, subject_id: str) -> Subject:
-        return next((subject for subject in self.subjects if subject.id == subject_id), None)
+        return self._subjects.get(subject_id)
 
     def drop_subject(self, subject_id: str) -> None:
-        subject = self.find_enrolled_subject(subject_id)
+        subject = self._subjects.pop(subject_id, None)
         if not subject == None:
-            self._subjects.remove(subject)
+            if self._subject_ids is not None:
+                self._subject_ids.release(subject_id)
+            self._mark_total -= subject._mark
             self.overall_mark = self._calculate_average_mark()
-            self.overall_grade = Utils.calculate_grade(self.overall_mark)
+            self._notify("drop", subject=subject_id)
 
     def change_password(self, new_password: str) -> None:
-        self._password = new_password
+        self.set_password_hash(PasswordHasher.hash(new_password))
+
+    # stores an already derived hash, so callers can run the KDF outside the database locks
+    def set_password_hash(self, password_hash: str) -> None:
+        self._password = password_hash
+        self._notify("password", password=password_hash)
+
+    def _notify(self, op: str, **data) -> None:
+        if self._observer is not None:
+            self._observer.student_changed(self, op, **data)
+
+    # an id this student does not hold, in amortised constant time
+    def next_subject_id(self) -> str:
+        if self._subject_ids is None:
+            self._subject_ids = SubjectIdCursor()
+        return self._subject_ids.next_id(self._subjects)
+
+    def _set_subjects(self, subjects: list[Subject]) -> None:
+        self._subjects = {subject.id: subject for subject in subjects}
+        self._mark_total = sum(subject._mark for subject in subjects)
+        self.overall_mark = self._calculate_average_mark()
 
     def _calculate_average_mark(self) -> float:
-        total_mark = sum(subject._mark for subject in self._subjects)
-        return total_mark / len(self._subjects) if len(self._subjects) > 0 else None
+        return self._mark_total / len(self._subjects) if len(self._subjects) > 0 else None
 
     def passes_course(self) -> bool:
-        return self.overall_mark >= Student.MIN_PASS_MARK if self.overall_mark else None
+        return self._grading().passes(self.overall_mark) if self.overall_mark else None
     
     def check_password(self, password:str) -> bool:
-        return self._password == password
+        return PasswordHasher.verify(password, self._password)
+
+
+# for storage engines that do not keep the grade indexes in memory: reports scan the roster instead
+class ScanningReportsMixin:
+    def group_by_grade(self) -> dict[str, list[Student]]:
+        grouped = {grade: [] for grade in Utils.GRADES}
+        for student in self.students:
+            if student.overall_grade is not None:
+                grouped.setdefault(student.overall_grade, []).append(student)
+        return {grade: group for grade, group in grouped.items() if group}
+
+    def partition_by_result(self) -> dict[str, list[Student]]:
+        partitioned = {"PASS": [], "FAIL": []}
+        for student in self.students:
+            if student.overall_grade is not None:
+                partitioned["PASS" if student.passes_course() else "FAIL"].append(student)
+        return partitioned
+
+    def grade_count(self, grade: str) -> int:
+        return len(self.group_by_grade().get(grade, ()))
+
+    def result_count(self, result: str) -> int:
+        return len(self.partition_by_result().get(result, ()))
+
+    # one scan for both counts
+    def pass_rate(self) -> float:
+        partitioned = self.partition_by_result()
+        passed, failed = len(partitioned["PASS"]), len(partitioned["FAIL"])
+        return passed / (passed + failed) if passed + failed > 0 else None
+
+    def grade_histogram(self) -> dict[str, int]:
+        grouped = self.group_by_grade()
+        return {grade: len(grouped.get(grade, ())) for grade in Utils.GRADES}
+
+    def cohort_mean_mark(self) -> float:
+        marks = [student.overall_mark for student in self.students if student.overall_mark is not None]
+        return sum(marks) / len(marks) if marks else None
+
+    def _apply_grading(self, grading: GradingScheme) -> None:
+        self.grading = grading
 
 
 class Database:
-    def __init__(self) -> None:
-        self.FILE_NAME: str = "students.data"
+    JOURNAL_CHECKPOINT_INTERVAL = 1000
+    READ_ONLY = False
+
+    def __init__(self, file_name: str = "students.data", journal: bool = False, randomize_ids: bool = True,
+                 flush_policy: FlushPolicy = None, background_writes: bool = False, shared: bool = False,
+                 concurrent: bool = False) -> None:
+        if shared and (journal or background_writes):
+            raise ValueError("A shared database saves whole snapshots in the foreground")
+        # the timer flushes from its own thread, so mutations must be serialised with it
+        if flush_policy is not None and flush_policy.mode == FlushMode.EVERY_T_MILLISECONDS and not concurrent:
+            raise ValueError("Timed flushes need a concurrent database")
+        self.FILE_NAME: str = file_name
+        self._randomize_ids: bool = randomize_ids
+        self._flush_policy: FlushPolicy = flush_policy or FlushPolicy.IMMEDIATE()
+        self._pending_mutations: int = 0
+        self._flush_timer: threading.Timer = None
+        self._flush_lock = threading.RLock()
+        self._journal: Journal = Journal(self.FILE_NAME + ".journal") if journal else None
+        self._replaying: bool = False
+        self._writer: BackgroundWriter = BackgroundWriter(self._write_file) if background_writes else None
+        # shared databases may be written by several processes: writes take the lock
+        # and reads reload only when the file's stat signature moved
+        self._lock: FileLock = FileLock(self.FILE_NAME + ".lock") if shared else None
+        self._disk_state: tuple = None
+        # concurrent databases let lookups and reports run in parallel and give
+        # mutations, including callers' changes to Student objects, the lock alone
+        self._rw_lock: ReadWriteLock = ReadWriteLock() if concurrent else None
+        self._removal_listeners: list = []
+        self.grading: GradingScheme = GradingScheme.load(self.FILE_NAME + ".grading") or GradingScheme.DEFAULT
         self._create_file_if_not_exists()
         self._load()
 
+    def reading(self):
+        return self._rw_lock.reading() if self._rw_lock is not None else nullcontext()
+
+    # services hold this around every change they make to students or the roster
+    def writing(self):
+        return self._rw_lock.writing() if self._rw_lock is not None else nullcontext()
+
+    # listeners are told student_removed(id) when a student leaves the roster and
+    # students_cleared() when the whole roster is cleared
+    def add_removal_listener(self, listener) -> None:
+        self._removal_listeners.append(listener)
+
+    def _notify_removed(self, id: str) -> None:
+        for listener in self._removal_listeners:
+            listener.student_removed(id)
+
+    def _notify_cleared(self) -> None:
+        for listener in self._removal_listeners:
+            listener.students_cleared()
+
     def _create_file_if_not_exists(self) -> None:
         if not os.path.exists(self.FILE_NAME):
-            with open(self.FILE_NAME, 'w') as file:
-                encoded = jsonpickle.encode([])
-                file.write(encoded)
+            with open(self.FILE_NAME, 'w', encoding='utf-8') as file:
+                StudentCodec.write_file(file, [])
 
     def save(self) -> None:
-        with open(self.FILE_NAME, 'w') as file:
-            file.write(jsonpickle.encode(self.students))
-        
+        with self.writing():
+            if self._lock is not None:
+                with self._lock:
+                    if self._file_state() != self._disk_state:
+                        self._merge_from_disk()
+                    self._sync_id_allocator()
+                    self._write_snapshot()
+                    self._disk_state = self._file_state()
+                    self._removed_ids.clear()
+                return
+            if self._id_allocator.dirty:
+                self._id_allocator.save(self.FILE_NAME + ".ids")
+            if self._journal is None:
+                self._write_snapshot()
+                return
+            self._journal.flush()
+            if self._journal.record_count >= Database.JOURNAL_CHECKPOINT_INTERVAL:
+                self.checkpoint()
+
+    # called after each successful mutation; persists according to the flush policy
+    def commit(self) -> None:
+        with self.writing(), self._flush_lock:
+            self._pending_mutations += 1
+            mode = self._flush_policy.mode
+            if mode == FlushMode.IMMEDIATE:
+                self.flush()
+            elif mode == FlushMode.EVERY_N_MUTATIONS:
+                if self._pending_mutations >= self._flush_policy.mutations:
+                    self.flush()
+            elif mode == FlushMode.EVERY_T_MILLISECONDS:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self._flush_policy.milliseconds / 1000, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+
+    # coalesces every pending mutation into a single write
+    def flush(self) -> None:
+        with self.writing(), self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending_mutations = 0
+            self.save()
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    # returns once every save issued so far is on disk
+    def wait_durable(self, timeout: float = None) -> bool:
+        return self._writer.wait(timeout) if self._writer is not None else True
+
+    # fold the journal into a fresh snapshot so replay stays short
+    def checkpoint(self) -> None:
+        self._write_snapshot()
+        if self._journal is not None:
+            self.wait_durable()
+            self._journal.truncate()
+
+    # clean students reuse the encoding cached by the previous snapshot
+    def _write_snapshot(self) -> None:
+        # swap the dirty set first: a student changed while this runs stays dirty for the next save
+        dirty, self._dirty = self._dirty, set()
+        parts = []
+        self.last_save_encoded = 0
+        self.last_save_reused = 0
+        for student in self.students:
+            encoded = self._encoded.get(student.id)
+            if encoded is None or student.id in dirty:
+                encoded = StudentCodec.encode(student.to_record())
+                self._encoded[student.id] = encoded
+                self.last_save_encoded += 1
+            else:
+                self.last_save_reused += 1
+            parts.append(encoded)
+        if self._writer is not None:
+            self._writer.submit(parts)
+        else:
+            self._write_file(parts)
+
+    def _write_file(self, parts: list[str]) -> None:
+        StudentCodec.write_atomically(self.FILE_NAME, parts)
+
+    # atomic saves replace the inode; size and mtime catch edits made in place
+    def _file_state(self) -> tuple:
+        stat = os.stat(self.FILE_NAME)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    # picks up whatever another process saved since this one last read or wrote the file
+    def refresh(self) -> bool:
+        if self._lock is None or self._file_state() == self._disk_state:
+            return False
+        with self.writing(), self._flush_lock:
+            self._merge_from_disk()
+        return True
+
+    # the file on disk overlaid with this process's unsaved registrations, changes and
+    # removals; clean students are updated in place so references callers hold stay live
+    def _merge_from_disk(self) -> None:
+        self._disk_state = self._file_state()
+        self.grading = GradingScheme.load(self.FILE_NAME + ".grading") or self.grading
+        local = self._students_by_id
+        students = []
+        for record, line in StudentCodec.read_file(self.FILE_NAME):
+            id = record[0]
+            if id in self._removed_ids:
+                continue
+            student = local.pop(id, None)
+            if student is None:
+                student = Student.from_record(record)
+            elif id not in self._dirty:
+                student._update_from_record(record)
+            if id not in self._dirty and line is not None:
+                self._encoded[id] = line
+            students.append(student)
+        for id, student in local.items():
+            if id in self._dirty:
+                students.append(student)
+            else:
+                student._observer = None
+                self._encoded.pop(id, None)
+                self._notify_removed(id)
+        self.students = students
+        self._students_by_id = {}
+        self._students_by_email = {}
+        self._reset_grade_indexes()
+        for student in students:
+            self._index(student)
+
+    # other processes allocate from the same sidecar, so it is re-read under the lock
+    # and this process's removals and registrations are applied on top
+    def _sync_id_allocator(self) -> None:
+        self._id_allocator = IdAllocator.load(self.FILE_NAME + ".ids") or self._id_allocator
+        for id in self._removed_ids:
+            self._id_allocator.release(int(id))
+        for id in self._students_by_id:
+            self._id_allocator.reserve(int(id))
+        if self._id_allocator.dirty:
+            self._id_allocator.save(self.FILE_NAME + ".ids")
+
+    def _reset_state(self) -> None:
+        self.students: list[Student] = []
+        self._students_by_id: dict[str, Student] = {}
+        self._students_by_email: dict[str, Student] = {}
+        self._dirty: set[str] = set()
+        self._removed_ids: set[str] = set()
+        self._encoded: dict[str, str] = {}
+        self.last_save_encoded: int = 0
+        self.last_save_reused: int = 0
+        self._reset_grade_indexes()
+        self._id_allocator = IdAllocator.load(self.FILE_NAME + ".ids") or IdAllocator(randomize=self._randomize_ids)
 
     def _load(self) -> None:
-        with open(self.FILE_NAME, 'r') as file:
-            data = file.read()
-            self.students: list[Student] = jsonpickle.decode(data)
+        self._reset_state()
+        self._disk_state = self._file_state()
+        # the lines just read double as the encoding cache, so the first save reuses them
+        for record, line in StudentCodec.read_file(self.FILE_NAME):
+            student = Student.from_record(record)
+            self.students.append(student)
+            self._index(student)
+            if line is not None:
+                self._encoded[student.id] = line
+        if self._journal is not None:
+            self._replaying = True
+            for record in self._journal.replay():
+                self._apply(record)
+            self._replaying = False
+        self._verify_id_allocator([student.id for student in self.students])
+
+    # the persisted allocator is only trusted if it covers exactly the ids on disk
+    def _verify_id_allocator(self, ids: list[str]) -> None:
+        allocator = self._id_allocator
+        if allocator.count == len(ids) and all(allocator.is_used(int(id)) for id in ids):
+            return
+        self._id_allocator = IdAllocator(randomize=self._randomize_ids)
+        for id in ids:
+            self._id_allocator.reserve(int(id))
+
+    # journal records are applied with assignment semantics so replaying a journal
+    # over a snapshot that already contains some of its records is harmless
+    def _apply(self, record: dict) -> None:
+        op = record["op"]
+        if op == "clear":
+            self.clear()
+            return
+        student = self.find_student_by_id(record["id"])
+        if op == "register":
+            if student is not None:
+                self.remove_student(student.id)
+            self.register_student(record["id"], record["name"], record["email"], record["password"])
+        elif student is None:
+            return
+        elif op == "remove":
+            self.remove_student(student.id)
+        elif op == "enroll":
+            student.drop_subject(record["subject"])
+            student.enroll_in_subject(Subject(record["subject"], record["mark"]))
+        elif op == "drop":
+            student.drop_subject(record["subject"])
+        elif op == "password":
+            student.set_password_hash(record["password"])
+
+    def _record(self, op: str, **data) -> None:
+        if self._journal is not None and not self._replaying:
+            self._journal.record(op, **data)
+
+    def student_changed(self, student: Student, op: str, **data) -> None:
+        if op in ("enroll", "drop"):
+            self._reindex_grade(student)
+        self._dirty.add(student.id)
+        self._record(op, id=student.id, **data)
+
+    def _index(self, student: Student) -> None:
+        # attached first, so the student is graded under this database's scheme
+        student._observer = self
+        self._students_by_id[student.id] = student
+        self._students_by_email.setdefault(student.email, student)
+        self._id_allocator.reserve(int(student.id))
+        self._reindex_grade(student)
+
+    def _unindex(self, student: Student) -> None:
+        del self._students_by_id[student.id]
+        if self._students_by_email.get(student.email) is student:
+            del self._students_by_email[student.email]
+        self._id_allocator.release(int(student.id))
+        self._unindex_grade(student)
+        self._dirty.discard(student.id)
+        self._encoded.pop(student.id, None)
+        student._observer = None
+
+    # grade buckets and PASS/FAIL buckets map student id -> student, so moving a
+    # student between buckets is a constant number of dict operations
+    def _reset_grade_indexes(self) -> None:
+        self._grade_index: dict[str, dict[str, Student]] = {grade: {} for grade in Utils.GRADES}
+        self._result_index: dict[str, dict[str, Student]] = {"PASS": {}, "FAIL": {}}
+        # overall mark each graded student currently contributes to the cohort total
+        self._cohort_marks: dict[str, float] = {}
+        self._cohort_mark_total: float = 0.0
+
+    def _unindex_grade(self, student: Student) -> None:
+        for bucket in self._grade_index.values():
+            bucket.pop(student.id, None)
+        for bucket in self._result_index.values():
+            bucket.pop(student.id, None)
+        mark = self._cohort_marks.pop(student.id, None)
+        if mark is not None:
+            # restart from zero once empty so rounding error cannot accumulate forever
+            self._cohort_mark_total = self._cohort_mark_total - mark if self._cohort_marks else 0.0
+
+    def _reindex_grade(self, student: Student) -> None:
+        self._unindex_grade(student)
+        if student.overall_grade is not None:
+            self._grade_index.setdefault(student.overall_grade, {})[student.id] = student
+            self._result_index["PASS" if student.passes_course() else "FAIL"][student.id] = student
+            self._cohort_marks[student.id] = student.overall_mark
+            self._cohort_mark_total += student.overall_mark
+
+    def group_by_grade(self) -> dict[str, list[Student]]:
+        self.refresh()
+        with self.reading():
+            return {grade: list(bucket.values()) for grade, bucket in self._grade_index.items() if bucket}
+
+    def partition_by_result(self) -> dict[str, list[Student]]:
+        self.refresh()
+        with self.reading():
+            return {result: list(bucket.values()) for result, bucket in self._result_index.items()}
+
+    def grade_count(self, grade: str) -> int:
+        self.refresh()
+        with self.reading():
+            return len(self._grade_index.get(grade, ()))
+
+    def result_count(self, result: str) -> int:
+        self.refresh()
+        with self.reading():
+            return len(self._result_index.get(result, ()))
+
+    def grade_histogram(self) -> dict[str, int]:
+        return {grade: self.grade_count(grade) for grade in Utils.GRADES}
+
+    def cohort_mean_mark(self) -> float:
+        self.refresh()
+        with self.reading():
+            return self._cohort_mark_total / len(self._cohort_marks) if self._cohort_marks else None
+
+    def pass_rate(self) -> float:
+        passed, failed = self.result_count("PASS"), self.result_count("FAIL")
+        return passed / (passed + failed) if passed + failed > 0 else None
+
+    # regrades every student against new cutoffs (and optionally a new pass mark) in one
+    # pass over the marks; returns how many students move from one grade to another,
+    # keyed by (old grade, new grade). A dry run only reports the moves. The new scheme
+    # is saved to <file>.grading straight away; marks, and so the data file, are unchanged.
+    def regrade(self, cutoffs: tuple, pass_mark: float = None, dry_run: bool = False) -> dict[tuple[str, str], int]:
+        self.refresh()
+        with self.writing():
+            return self._regrade(cutoffs, pass_mark, dry_run)
+
+    def _regrade(self, cutoffs: tuple, pass_mark: float, dry_run: bool) -> dict[tuple[str, str], int]:
+        grading = GradingScheme(cutoffs, self.grading.pass_mark if pass_mark is None else pass_mark)
+        students = [student for student in self.students if student.overall_mark is not None]
+        grades = grading.grades([student.overall_mark for student in students])
+        moves: dict[tuple[str, str], int] = {}
+        for student, grade in zip(students, grades):
+            if grade != student.overall_grade:
+                moves[(student.overall_grade, grade)] = moves.get((student.overall_grade, grade), 0) + 1
+        if dry_run:
+            return moves
+        with self._lock or nullcontext():
+            grading.save(self.FILE_NAME + ".grading")
+        self._apply_grading(grading)
+        return moves
+
+    def _apply_grading(self, grading: GradingScheme) -> None:
+        self.grading = grading
+        self._reset_grade_indexes()
+        for student in self._students_by_id.values():
+            self._reindex_grade(student)
 
     def clear(self) -> None:
-        self.students = []
+        self.refresh()
+        with self.writing():
+            for student in self.students:
+                student._observer = None
+            if self._lock is not None:
+                self._removed_ids.update(self._students_by_id)
+            self.students = []
+            self._students_by_id.clear()
+            self._students_by_email.clear()
+            self._dirty.clear()
+            self._encoded.clear()
+            self._reset_grade_indexes()
+            self._id_allocator = IdAllocator(randomize=self._randomize_ids)
+            self._record("clear")
+            self._notify_cleared()
 
     def find_student_by_email(self, email: str) -> Student:
-        return next((s for s in self.students if s.email == email), None)
+        self.refresh()
+        with self.reading():
+            return self._students_by_email.get(email)
 
     def find_student_by_id(self, id: str) -> Student:
-        return next((s for s in self.students if s.id == id), None)
+        self.refresh()
+        with self.reading():
+            return self._students_by_id.get(id)
+
+    # in shared mode another process may have removed a student the caller still holds;
+    # the refresh inside find_student_by_id detaches it, so identity tells them apart
+    def is_current(self, student: Student) -> bool:
+        return self._lock is None or self.find_student_by_id(student.id) is student
 
     def remove_student(self, id: str) -> bool:
-        student = self.find_student_by_id(id)
-        if student == None:
-            return False
-        self.students.remove(student)
-        return True
+        with self.writing():
+            student = self.find_student_by_id(id)
+            if student == None:
+                return False
+            self.students.remove(student)
+            self._unindex(student)
+            # only a shared save needs removals, to keep the merge from resurrecting them
+            if self._lock is not None:
+                self._removed_ids.add(id)
+            self._record("remove", id=id)
+            self._notify_removed(id)
+            return True
 
     def register_student(self, id: str, name: str, email: str, password: str) -> Student:
-        student = Student(id, name, email, password)
-        self.students.append(student)
-        return student
+        with self.writing():
+            student = Student(id, name, email, password)
+            self.students.append(student)
+            self._index(student)
+            self._dirty.add(id)
+            self._removed_ids.discard(id)
+            self._record("register", id=id, name=name, email=email, password=password)
+            return student
 
     def generate_unique_student_id(self) -> str:
-        while True:
-            id = str(random.randint(1, 999999)).zfill(6)
-            if not self.find_student_by_id(id):
-                return id
+        with self.writing():
+            if self._lock is not None:
+                with self._lock:
+                    self._sync_id_allocator()
+                    id = self._id_allocator.allocate()
+                    self._id_allocator.save(self.FILE_NAME + ".ids")
+                return str(id).zfill(6)
+            return str(self._id_allocator.allocate()).zfill(6)
+
+    # fewer ids than asked for are returned once the id space runs out
+    def generate_unique_student_ids(self, count: int) -> list[str]:
+        with self.writing():
+            if self._lock is not None:
+                with self._lock:
+                    self._sync_id_allocator()
+                    ids = self._id_allocator.allocate_many(count)
+                    self._id_allocator.save(self.FILE_NAME + ".ids")
+            else:
+                ids = self._id_allocator.allocate_many(count)
+            return [str(id).zfill(6) for id in ids]
 
     def generate_unique_subject_id(self, student: Student) -> str:
-        while True:
-            id = str(random.randint(1, 999)).zfill(3)
-            if not student.find_enrolled_subject(id):
-                return id
-    
\ No newline at end of file
+        return student.next_subject_id()
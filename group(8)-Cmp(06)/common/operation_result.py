@@ -9,6 +9,10 @@ class ResultStatus(StrEnum):
     STUDENT_NOT_FOUND = "Student does not exist"
     F_STUDENT_NOT_FOUND = "Student {} does not exist"
     STUDENT_ALREADY_EXISTS = "Student {} already exists"
+    STUDENT_IDS_EXHAUSTED = "No free student IDs are left"
+    MALFORMED_ROW = "Row could not be read"
+    MISSING_FIELDS = "Name, email and password are all required"
+    INVALID_SESSION = "Session is invalid or has expired"
 
 class OperationResult():
     def __init__(self, success:bool, status: ResultStatus, data: any = None):
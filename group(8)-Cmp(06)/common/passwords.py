@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Salted scrypt password hashes, stored as "scrypt$n$r$p$salt$key" with base64 salt
+# and key. Records written before hashing hold the plain password; those still
+# verify and report needs_rehash() so callers can upgrade them on the next login.
+# Key derivation runs on a pool of one thread per core: hashlib releases the GIL
+# while deriving, and the pool caps how many 16 MiB scrypt states exist at once.
+class PasswordHasher:
+    SCHEME = "scrypt"
+    N = 2 ** 14
+    R = 8
+    P = 1
+    SALT_BYTES = 16
+    KEY_BYTES = 32
+    WORKERS = os.cpu_count() or 1
+
+    _pool: ThreadPoolExecutor = None
+    _pool_lock = threading.Lock()
+
+    @staticmethod
+    def pool() -> ThreadPoolExecutor:
+        with PasswordHasher._pool_lock:
+            if PasswordHasher._pool is None:
+                PasswordHasher._pool = ThreadPoolExecutor(PasswordHasher.WORKERS, thread_name_prefix="unisys-kdf")
+            return PasswordHasher._pool
+
+    @staticmethod
+    def is_hashed(stored: str) -> bool:
+        return stored.startswith(PasswordHasher.SCHEME + "$")
+
+    @staticmethod
+    def needs_rehash(stored: str) -> bool:
+        return not stored.startswith(f"{PasswordHasher.SCHEME}${PasswordHasher.N}${PasswordHasher.R}${PasswordHasher.P}$")
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=2 * 128 * n * r * p, dklen=PasswordHasher.KEY_BYTES)
+
+    @staticmethod
+    def _hash(password: str) -> str:
+        salt = os.urandom(PasswordHasher.SALT_BYTES)
+        key = PasswordHasher._derive(password, salt, PasswordHasher.N, PasswordHasher.R, PasswordHasher.P)
+        return "$".join((PasswordHasher.SCHEME, str(PasswordHasher.N), str(PasswordHasher.R), str(PasswordHasher.P),
+                         base64.b64encode(salt).decode('ascii'), base64.b64encode(key).decode('ascii')))
+
+    @staticmethod
+    def _verify(password: str, stored: str) -> bool:
+        if not PasswordHasher.is_hashed(stored):
+            return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+        try:
+            _, n, r, p, salt, key = stored.split("$")
+            expected = base64.b64decode(key)
+            derived = PasswordHasher._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(derived, expected)
+
+    @staticmethod
+    def hash(password: str) -> str:
+        return PasswordHasher.pool().submit(PasswordHasher._hash, password).result()
+
+    @staticmethod
+    def hash_many(passwords: list[str]) -> list[str]:
+        return list(PasswordHasher.pool().map(PasswordHasher._hash, passwords))
+
+    @staticmethod
+    def verify(password: str, stored: str) -> bool:
+        return PasswordHasher.pool().submit(PasswordHasher._verify, password, stored).result()
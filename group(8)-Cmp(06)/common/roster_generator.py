@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+from common.codec import StudentCodec
+from common.models import Student
+
+
+# Reproducible synthetic rosters for load tests: the same count and seed always give
+# the same students. Every random draw is made a batch at a time, and since names,
+# emails and passwords only use characters JSON leaves alone, codec lines are
+# formatted directly instead of going through the encoder.
+FIRST_NAMES = ("Amelia", "Noah", "Olivia", "Liam", "Isla", "Jack", "Mia", "Leo", "Ava", "Oliver",
+               "Zara", "Omar", "Priya", "Wei", "Sofia", "Mateo", "Hana", "Kofi", "Elena", "Yusuf")
+LAST_NAMES = ("Smith", "Nguyen", "Williams", "Brown", "Wilson", "Taylor", "Patel", "Chen", "Martin", "Kelly",
+              "Singh", "Garcia", "Ali", "Kim", "Rossi", "Murphy", "Santos", "Cohen", "Ito", "Okafor")
+PASSWORD_WORDS = ("Password", "Welcome", "Student", "Campus", "Library", "Lecture")
+ID_SPACE = 1_000_000
+SUBJECT_IDS = 999
+MIN_MARK = 25
+MAX_MARK = 100
+
+
+def generate_lines(count: int, seed: int = 0, batch_size: int = 100_000):
+    if not 0 <= count < ID_SPACE:
+        raise ValueError(f"A roster holds between 0 and {ID_SPACE - 1} students")
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, ID_SPACE), count)
+    # "name","first.last  -- completed with the row index and domain per student
+    people = [f'"{first} {last}","{first.lower()}.{last.lower()}' for first in FIRST_NAMES for last in LAST_NAMES]
+    passwords = [f'"{word}{digits:03}"' for word in PASSWORD_WORDS for digits in range(1000)]
+    subject_ids = [f'["{id:03}",' for id in range(1, SUBJECT_IDS + 1)]
+    # a student's subjects are evenly spaced from a random first id, so they never collide
+    stride = SUBJECT_IDS // Student.MAX_SUBJECTS
+    slots = range(Student.MAX_SUBJECTS)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        subject_counts = rng.choices(range(Student.MAX_SUBJECTS + 1), k=size)
+        marks = rng.choices(range(MIN_MARK, MAX_MARK + 1), k=sum(subject_counts))
+        first_subjects = rng.choices(range(SUBJECT_IDS), k=size)
+        chosen_people = rng.choices(people, k=size)
+        chosen_passwords = rng.choices(passwords, k=size)
+        position = 0
+        for offset in range(size):
+            index = start + offset
+            taken = subject_counts[offset]
+            first = first_subjects[offset]
+            subjects = ",".join([f"{subject_ids[(first + slot * stride) % SUBJECT_IDS]}{marks[position + slot]}]"
+                                 for slot in slots[:taken]])
+            position += taken
+            yield (f'["{ids[index]:06}",{chosen_people[offset]}{index}@university.com",'
+                   f'{chosen_passwords[offset]},[{subjects}]]\n')
+
+
+def generate_records(count: int, seed: int = 0):
+    return (StudentCodec.decode(line) for line in generate_lines(count, seed))
+
+
+def write_roster(file_name: str, count: int, seed: int = 0) -> int:
+    if os.path.exists(file_name):
+        raise FileExistsError(f"{file_name} already exists")
+    StudentCodec.write_atomically(file_name, generate_lines(count, seed))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic students database")
+    parser.add_argument("count", type=int)
+    parser.add_argument("target", nargs="?", default="students.data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{write_roster(args.target, args.count, args.seed)} students written to {args.target}")
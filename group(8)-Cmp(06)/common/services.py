@@ -1,6 +1,10 @@
 from common.operation_result import OperationResult, ResultStatus
 from common.utils import Utils
 from common.models import Database, Student, Subject
+from common.passwords import PasswordHasher
+from common.id_allocator import IdSpaceExhausted
+from common.sessions import SessionStore
+from common import bulk_io
 
 
 class StudentOperationsService:
@@ -13,24 +17,34 @@ class StudentOperationsService:
             return OperationResult.FAILURE(ResultStatus.PASSWORD_MISMATCH)
         if not Utils.verify_password(password):
             return OperationResult.FAILURE(ResultStatus.INCORRECT_PASSWORD)
-        self.student.change_password(password)
-        self.db.save()
+        password_hash = PasswordHasher.hash(password)
+        with self.db.writing():
+            if not self.db.is_current(self.student):
+                return OperationResult.FAILURE(ResultStatus.STUDENT_NOT_FOUND)
+            self.student.set_password_hash(password_hash)
+            self.db.commit()
         return OperationResult.SUCCESS()
 
     def enroll_in_subject(self) -> OperationResult:
-        if not self.student.can_enroll_subject():
-            return OperationResult.FAILURE(ResultStatus.ENROLL_LIMIT_REACHED)
-        subject_id = self.db.generate_unique_subject_id(self.student)
-        subject = Subject(subject_id)
-        self.student.enroll_in_subject(subject)
-        self.db.save()
+        with self.db.writing():
+            if not self.db.is_current(self.student):
+                return OperationResult.FAILURE(ResultStatus.STUDENT_NOT_FOUND)
+            if not self.student.can_enroll_subject():
+                return OperationResult.FAILURE(ResultStatus.ENROLL_LIMIT_REACHED)
+            subject_id = self.db.generate_unique_subject_id(self.student)
+            subject = Subject(subject_id)
+            self.student.enroll_in_subject(subject)
+            self.db.commit()
         return OperationResult.SUCCESS(subject)
 
     def drop_subject(self, subject_id) -> OperationResult:
-        if not self.student.find_enrolled_subject(subject_id):
-            return OperationResult.FAILURE(ResultStatus.SUBJECT_NOT_FOUND)
-        self.student.drop_subject(subject_id)
-        self.db.save()
+        with self.db.writing():
+            if not self.db.is_current(self.student):
+                return OperationResult.FAILURE(ResultStatus.STUDENT_NOT_FOUND)
+            if not self.student.find_enrolled_subject(subject_id):
+                return OperationResult.FAILURE(ResultStatus.SUBJECT_NOT_FOUND)
+            self.student.drop_subject(subject_id)
+            self.db.commit()
         return OperationResult.SUCCESS()
 
 
@@ -47,11 +61,64 @@ class RegisterService:
         return OperationResult.SUCCESS()
 
     def register_student(self, name, email, password) -> OperationResult:
-        student_id = self.db.generate_unique_student_id()
-        student = self.db.register_student(student_id, name, email, password)
-        self.db.save()
+        password_hash = PasswordHasher.hash(password)
+        with self.db.writing():
+            # checked again under the lock: another session may have registered the email meanwhile
+            found_student = self.db.find_student_by_email(email)
+            if found_student:
+                return OperationResult.FAILURE(ResultStatus.STUDENT_ALREADY_EXISTS, found_student)
+            try:
+                student_id = self.db.generate_unique_student_id()
+            except IdSpaceExhausted:
+                return OperationResult.FAILURE(ResultStatus.STUDENT_IDS_EXHAUSTED)
+            student = self.db.register_student(student_id, name, email, password_hash)
+            self.db.commit()
         return OperationResult.SUCCESS(student)
 
+    def _validate_row(self, row: dict, emails: set[str]) -> OperationResult:
+        if row is None:
+            return OperationResult.FAILURE(ResultStatus.MALFORMED_ROW)
+        if not all(isinstance(row.get(field), str) and row[field].strip() for field in bulk_io.IMPORT_FIELDS):
+            return OperationResult.FAILURE(ResultStatus.MISSING_FIELDS)
+        email = row["email"].strip()
+        if not Utils.verify_email(email) or not Utils.verify_password(row["password"]):
+            return OperationResult.FAILURE(ResultStatus.INVALID_CREDENTIALS)
+        if email in emails or self.db.find_student_by_email(email):
+            return OperationResult.FAILURE(ResultStatus.STUDENT_ALREADY_EXISTS, email)
+        return OperationResult.SUCCESS()
+
+    # registers every valid row of a CSV or JSONL file, chunk_size rows at a time: each
+    # chunk is validated, gets its ids in one allocation and is saved once. Returns the
+    # number of students imported and a (row number, failure) pair for every rejected row.
+    # Passwords are hashed on the KDF pool before the chunk takes the write lock.
+    def import_students(self, file_name: str, chunk_size: int = 1000) -> tuple[int, list[tuple[int, OperationResult]]]:
+        imported = 0
+        failures: list[tuple[int, OperationResult]] = []
+        emails: set[str] = set()
+        for chunk in bulk_io.read_chunks(file_name, chunk_size):
+            passwords = {row_number: row["password"] for row_number, row in chunk if row is not None
+                         and isinstance(row.get("password"), str) and Utils.verify_password(row["password"])}
+            hashes = dict(zip(passwords, PasswordHasher.hash_many(list(passwords.values()))))
+            with self.db.writing():
+                valid = []
+                for row_number, row in chunk:
+                    result = self._validate_row(row, emails)
+                    if result.success:
+                        emails.add(row["email"].strip())
+                        valid.append((row_number, row))
+                    else:
+                        failures.append((row_number, result))
+                ids = self.db.generate_unique_student_ids(len(valid))
+                for row_number, _ in valid[len(ids):]:
+                    failures.append((row_number, OperationResult.FAILURE(ResultStatus.STUDENT_IDS_EXHAUSTED)))
+                for id, (row_number, row) in zip(ids, valid):
+                    self.db.register_student(id, row["name"].strip(), row["email"].strip(), hashes[row_number])
+                imported += len(ids)
+                if ids:
+                    self.db.flush()
+        failures.sort(key=lambda failure: failure[0])
+        return imported, failures
+
 
 class LoginService:
     def __init__(self, db):
@@ -63,12 +130,50 @@ class LoginService:
         found_student = self.db.find_student_by_email(email)
         if found_student:
             if found_student.check_password(password):
+                self._upgrade_password_hash(found_student, password)
                 return OperationResult.SUCCESS(found_student)
             else:
                 return OperationResult.FAILURE(ResultStatus.INCORRECT_PASSWORD)
         else:
             return OperationResult.FAILURE(ResultStatus.STUDENT_NOT_FOUND)
 
+    # plain-text and outdated hashes are replaced on a successful login, unless the
+    # database is read-only or the password changed while the new hash was being derived
+    def _upgrade_password_hash(self, student: Student, password: str) -> None:
+        stored = student._password
+        if self.db.READ_ONLY or not PasswordHasher.needs_rehash(stored):
+            return
+        password_hash = PasswordHasher.hash(password)
+        with self.db.writing():
+            if student._password != stored:
+                return
+            student.set_password_hash(password_hash)
+            self.db.commit()
+
+
+# token-based login for clients that cannot hold on to the Student object
+class SessionService:
+    def __init__(self, db: Database, store: SessionStore):
+        self.login_service = LoginService(db)
+        self.store = store
+
+    def login(self, email, password) -> OperationResult:
+        result = self.login_service.login_student(email, password)
+        if not result.success:
+            return result
+        return OperationResult.SUCCESS(self.store.create(result.data))
+
+    def resolve(self, token) -> OperationResult:
+        student = self.store.resolve(token)
+        if not student:
+            return OperationResult.FAILURE(ResultStatus.INVALID_SESSION)
+        return OperationResult.SUCCESS(student)
+
+    def logout(self, token) -> OperationResult:
+        if not self.store.revoke(token):
+            return OperationResult.FAILURE(ResultStatus.INVALID_SESSION)
+        return OperationResult.SUCCESS()
+
 
 class AdminOperationsLogic:
 
@@ -76,27 +181,64 @@ class AdminOperationsLogic:
         self.db = db
 
     def group_students_by_grade(self) -> dict[str, list]:
-        grouped_students = {}
-        for student in self.db.students:
-            grade = student.overall_grade
-            if grade is not None:
-                if grade not in grouped_students:
-                    grouped_students[grade] = []
-                grouped_students[grade].append(student)
-        return grouped_students
+        return self.db.group_by_grade()
 
     def partition_students(self) -> dict:
-        partitioned_students = {"PASS": [], "FAIL": []}
-        for student in self.db.students:
-            if student.overall_grade is not None:
-                passes_string = "PASS" if student.passes_course() else "FAIL"
-                partitioned_students[passes_string].append(student)
-        return partitioned_students
+        return self.db.partition_by_result()
+
+    def count_students_by_grade(self) -> dict[str, int]:
+        return self.db.grade_histogram()
+
+    def cohort_mean_mark(self) -> float:
+        return self.db.cohort_mean_mark()
+
+    def pass_rate(self) -> float:
+        return self.db.pass_rate()
+
+    def regrade(self, cutoffs: tuple, pass_mark: float = None, dry_run: bool = False) -> dict[tuple[str, str], int]:
+        moves = self.db.regrade(cutoffs, pass_mark, dry_run)
+        if not dry_run:
+            self.db.commit()
+        return moves
+
+    # enrolls each student in the requested number of new subjects, within the
+    # MAX_SUBJECTS limit, and saves once for the whole batch. Results are listed per
+    # student, one per requested subject.
+    def enroll_students(self, enrollments: dict[str, int]) -> dict[str, list[OperationResult]]:
+        with self.db.writing():
+            return self._enroll_students(enrollments)
+
+    def _enroll_students(self, enrollments: dict[str, int]) -> dict[str, list[OperationResult]]:
+        results: dict[str, list[OperationResult]] = {}
+        enrolled = False
+        for student_id, count in enrollments.items():
+            student = self.db.find_student_by_id(student_id)
+            if not student:
+                results[student_id] = [OperationResult.FAILURE(ResultStatus.F_STUDENT_NOT_FOUND, student_id)]
+                continue
+            student_results = results[student_id] = []
+            for _ in range(count):
+                if not student.can_enroll_subject():
+                    student_results.append(OperationResult.FAILURE(ResultStatus.ENROLL_LIMIT_REACHED))
+                    continue
+                subject = student.enroll_in_subject(Subject(self.db.generate_unique_subject_id(student)))
+                student_results.append(OperationResult.SUCCESS(subject))
+                enrolled = True
+        if enrolled:
+            self.db.flush()
+        return results
+
+    def export_students(self, file_name: str) -> int:
+        self.db.refresh()
+        with self.db.reading():
+            return bulk_io.export_students(self.db.students, file_name)
 
     def remove_student(self, student_id) -> OperationResult:
         student = self.db.find_student_by_id(student_id)
         if not student:
             return OperationResult.FAILURE(ResultStatus.F_STUDENT_NOT_FOUND, student_id)
-        self.db.remove_student(student_id)
-        self.db.save()
+        with self.db.writing():
+            if not self.db.remove_student(student_id):
+                return OperationResult.FAILURE(ResultStatus.F_STUDENT_NOT_FOUND, student_id)
+            self.db.commit()
         return OperationResult.SUCCESS()
@@ -0,0 +1,97 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from common.models import Database, Student
+
+
+class Session:
+    __slots__ = ("token", "student", "created", "last_used")
+
+    def __init__(self, token: str, student: Student, now: float) -> None:
+        self.token = token
+        self.student = student
+        self.created = now
+        self.last_used = now
+
+
+# Token -> Student map for clients that authenticate once and then send a token.
+# Sessions are kept in least-recently-used order, so resolving a token, evicting
+# the oldest session when full and purging idle sessions are all O(1) per
+# session. A session ends after idle_ttl seconds without use or absolute_ttl
+# seconds after login, whichever comes first, and as soon as its student is
+# removed from the database.
+class SessionStore:
+    def __init__(self, db: Database, max_sessions: int = 10_000, idle_ttl: float = 30 * 60,
+                 absolute_ttl: float = 8 * 60 * 60, clock=time.monotonic) -> None:
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.absolute_ttl = absolute_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._tokens_by_student: dict[str, set[str]] = {}
+        db.add_removal_listener(self)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, student: Student) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            now = self._clock()
+            self._purge_idle(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+            self._sessions[token] = Session(token, student, now)
+            self._tokens_by_student.setdefault(student.id, set()).add(token)
+        return token
+
+    def resolve(self, token: str) -> Student:
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            now = self._clock()
+            if now - session.last_used > self.idle_ttl or now - session.created > self.absolute_ttl:
+                self._drop(token)
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(token)
+            return session.student
+
+    def revoke(self, token: str) -> bool:
+        with self._lock:
+            if token not in self._sessions:
+                return False
+            self._drop(token)
+            return True
+
+    def revoke_student(self, student_id: str) -> None:
+        with self._lock:
+            for token in self._tokens_by_student.pop(student_id, ()):
+                self._sessions.pop(token, None)
+
+    def student_removed(self, id: str) -> None:
+        self.revoke_student(id)
+
+    def students_cleared(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._tokens_by_student.clear()
+
+    # the least recently used sessions come first, so idle ones are all at the front
+    def _purge_idle(self, now: float) -> None:
+        while self._sessions:
+            token, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                return
+            self._drop(token)
+
+    def _drop(self, token: str) -> None:
+        session = self._sessions.pop(token)
+        tokens = self._tokens_by_student.get(session.student.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_student[session.student.id]
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import shutil
+from common.codec import StudentCodec
+from common.id_allocator import IdAllocator
+from common.models import Database, Student
+
+
+# Students are range-partitioned by id, so with 10 shards the shard is the first
+# id digit and with 100 shards the first two. Shards are read the first time a
+# lookup needs them and only shards holding changed students are rewritten.
+class ShardedDatabase(Database):
+    ID_SPACE = 1_000_000
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str = "students.shards", shard_count: int = 10, randomize_ids: bool = True) -> None:
+        self.shard_count = shard_count
+        super().__init__(directory, randomize_ids=randomize_ids)
+
+    def shard_of(self, id: str) -> int:
+        return int(id) * self.shard_count // ShardedDatabase.ID_SPACE
+
+    def _shard_file(self, shard: int) -> str:
+        return os.path.join(self.FILE_NAME, f"shard-{shard:03}.data")
+
+    def _create_file_if_not_exists(self) -> None:
+        manifest_file = os.path.join(self.FILE_NAME, ShardedDatabase.MANIFEST)
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r') as file:
+                manifest = json.load(file)
+            self.shard_count = manifest["shard_count"]
+            self._shard_sizes: list[int] = manifest["counts"]
+            return
+        os.makedirs(self.FILE_NAME, exist_ok=True)
+        self._shard_sizes = [0] * self.shard_count
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest_file = os.path.join(self.FILE_NAME, ShardedDatabase.MANIFEST)
+        with open(manifest_file + ".tmp", 'w') as file:
+            json.dump({"shard_count": self.shard_count, "counts": self._shard_sizes}, file)
+        os.replace(manifest_file + ".tmp", manifest_file)
+
+    def _load(self) -> None:
+        self._reset_state()
+        self._shards: dict[int, dict[str, Student]] = {}
+        self._dirty_shards: set[int] = set()
+        # trust the persisted allocator when it agrees with the manifest; otherwise it is
+        # rebuilt from every shard, but only once an id is actually allocated
+        self._allocator_stale: bool = self._id_allocator.count != sum(self._shard_sizes)
+
+    def _ensure_id_allocator(self) -> None:
+        if self._allocator_stale:
+            self._allocator_stale = False
+            self._verify_id_allocator([student.id for student in self.students])
+
+    def generate_unique_student_id(self) -> str:
+        self._ensure_id_allocator()
+        return super().generate_unique_student_id()
+
+    def generate_unique_student_ids(self, count: int) -> list[str]:
+        self._ensure_id_allocator()
+        return super().generate_unique_student_ids(count)
+
+    def _load_shard(self, shard: int) -> dict[str, Student]:
+        students = self._shards.get(shard)
+        if students is not None:
+            return students
+        students = {}
+        if os.path.exists(self._shard_file(shard)):
+            for record, line in StudentCodec.read_file(self._shard_file(shard)):
+                student = Student.from_record(record)
+                students[student.id] = student
+                self._index(student)
+                self._encoded[student.id] = line
+        self._shards[shard] = students
+        return students
+
+    def _load_all_shards(self) -> None:
+        for shard in range(self.shard_count):
+            self._load_shard(shard)
+
+    @property
+    def students(self) -> list[Student]:
+        self._load_all_shards()
+        return [student for shard in range(self.shard_count) for student in self._shards[shard].values()]
+
+    @students.setter
+    def students(self, value: list[Student]) -> None:
+        pass
+
+    def save(self) -> None:
+        if self._id_allocator.dirty and not self._allocator_stale:
+            self._id_allocator.save(self.FILE_NAME + ".ids")
+        dirty, self._dirty = self._dirty, set()
+        dirty_shards, self._dirty_shards = self._dirty_shards, set()
+        self.last_save_encoded = 0
+        self.last_save_reused = 0
+        for shard in sorted(dirty_shards):
+            parts = []
+            for student in self._shards[shard].values():
+                encoded = self._encoded.get(student.id)
+                if encoded is None or student.id in dirty:
+                    encoded = StudentCodec.encode(student.to_record())
+                    self._encoded[student.id] = encoded
+                    self.last_save_encoded += 1
+                else:
+                    self.last_save_reused += 1
+                parts.append(encoded)
+            StudentCodec.write_atomically(self._shard_file(shard), parts)
+            self._shard_sizes[shard] = len(parts)
+        if dirty_shards:
+            self._write_manifest()
+
+    def checkpoint(self) -> None:
+        self.save()
+
+    def student_changed(self, student: Student, op: str, **data) -> None:
+        super().student_changed(student, op, **data)
+        self._dirty_shards.add(self.shard_of(student.id))
+
+    def find_student_by_id(self, id: str) -> Student:
+        if not id.isdigit() or int(id) >= ShardedDatabase.ID_SPACE:
+            return None
+        return self._load_shard(self.shard_of(id)).get(id)
+
+    # shards are keyed by id, so an email lookup has to bring every shard in once
+    def find_student_by_email(self, email: str) -> Student:
+        self._load_all_shards()
+        return super().find_student_by_email(email)
+
+    def register_student(self, id: str, name: str, email: str, password: str) -> Student:
+        shard = self.shard_of(id)
+        student = Student(id, name, email, password)
+        self._load_shard(shard)[id] = student
+        self._index(student)
+        self._dirty.add(id)
+        self._dirty_shards.add(shard)
+        return student
+
+    def remove_student(self, id: str) -> bool:
+        student = self.find_student_by_id(id)
+        if student == None:
+            return False
+        shard = self.shard_of(id)
+        del self._shards[shard][id]
+        self._unindex(student)
+        self._dirty_shards.add(shard)
+        self._notify_removed(id)
+        return True
+
+    def clear(self) -> None:
+        for students in self._shards.values():
+            for student in students.values():
+                student._observer = None
+        self._reset_state()
+        self._id_allocator = IdAllocator(randomize=self._randomize_ids)
+        self._allocator_stale = False
+        self._shards = {shard: {} for shard in range(self.shard_count)}
+        self._dirty_shards = set(range(self.shard_count))
+        self._notify_cleared()
+
+    def group_by_grade(self) -> dict[str, list[Student]]:
+        self._load_all_shards()
+        return super().group_by_grade()
+
+    def partition_by_result(self) -> dict[str, list[Student]]:
+        self._load_all_shards()
+        return super().partition_by_result()
+
+    def grade_count(self, grade: str) -> int:
+        self._load_all_shards()
+        return super().grade_count(grade)
+
+    def result_count(self, result: str) -> int:
+        self._load_all_shards()
+        return super().result_count(result)
+
+    def cohort_mean_mark(self) -> float:
+        self._load_all_shards()
+        return super().cohort_mean_mark()
+
+
+# split a single-file students.data (or an existing shard directory) into shard_count shards
+def reshard(source: str, target: str, shard_count: int) -> int:
+    if os.path.isdir(source):
+        source_db = ShardedDatabase(source)
+        records = [(student.to_record(), source_db._encoded.get(student.id)) for student in source_db.students]
+    else:
+        records = list(StudentCodec.read_file(source))
+    if os.path.exists(os.path.join(target, ShardedDatabase.MANIFEST)):
+        raise FileExistsError(f"{target} already holds a sharded database")
+    os.makedirs(target, exist_ok=True)
+    shards: list[list[str]] = [[] for _ in range(shard_count)]
+    for record, line in records:
+        shards[int(record[0]) * shard_count // ShardedDatabase.ID_SPACE].append(line or StudentCodec.encode(record))
+    for shard, lines in enumerate(shards):
+        StudentCodec.write_atomically(os.path.join(target, f"shard-{shard:03}.data"), lines)
+    with open(os.path.join(target, ShardedDatabase.MANIFEST), 'w') as file:
+        json.dump({"shard_count": shard_count, "counts": [len(lines) for lines in shards]}, file)
+    # with a matching allocator sidecar, opening the new database reads no shard up front
+    allocator = IdAllocator()
+    for record, _ in records:
+        allocator.reserve(int(record[0]))
+    allocator.save(target + ".ids")
+    if os.path.exists(source + ".grading"):
+        shutil.copyfile(source + ".grading", target + ".grading")
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-shard a students database")
+    parser.add_argument("source", help="students.data file or shard directory")
+    parser.add_argument("target", help="new shard directory")
+    parser.add_argument("--shards", type=int, default=10)
+    args = parser.parse_args()
+    print(f"{reshard(args.source, args.target, args.shards)} students written to {args.shards} shards in {args.target}")
@@ -0,0 +1,291 @@
+import argparse
+import bisect
+import hashlib
+import math
+import mmap
+import os
+import struct
+from array import array
+from common.grading import GradingScheme
+from common.models import Database, Student, Subject
+from common.utils import Utils
+
+
+# Fixed-layout, column-oriented snapshot of a roster, read through mmap so every
+# process on the host shares the same page cache:
+#   header | ids u32 | overall marks f32 | grade codes u8 | subject counts u16 |
+#   subject ids u16 | subject marks u8 | string offsets u32 | strings |
+#   email hashes u64 | email rows u32
+# Rows are sorted by id; email hashes are sorted for binary search. Each row
+# owns MAX_SUBJECTS subject slots, and name/email/password live in the string
+# blob at offsets[3 * row + field].
+class SnapshotFormat:
+    MAGIC = b"USNP"
+    VERSION = 2
+    SECTIONS = ("ids", "marks", "grades", "subject_counts", "subject_ids", "subject_marks",
+                "string_offsets", "strings", "email_hashes", "email_rows")
+    HEADER = struct.Struct("<4sHHI" + "I" * (len(Utils.GRADES) + 1) + "Q" * len(SECTIONS))
+    NO_GRADE = 255
+
+    @staticmethod
+    def email_hash(email: str) -> int:
+        return int.from_bytes(hashlib.blake2b(email.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def write_snapshot(db: Database, file_name: str) -> int:
+    students = sorted(db.students, key=lambda student: int(student.id))
+    slots = Student.MAX_SUBJECTS
+    ids, marks, grades, subject_counts = array('I'), array('f'), bytearray(), array('H')
+    subject_ids, subject_marks = array('H', bytes(2 * slots * len(students))), bytearray(slots * len(students))
+    string_offsets, strings = array('I', [0]), bytearray()
+    grade_counts = [0] * len(Utils.GRADES)
+    pass_count = 0
+    for row, student in enumerate(students):
+        ids.append(int(student.id))
+        marks.append(student.overall_mark if student.overall_mark is not None else math.nan)
+        grade = Utils.GRADES.index(student.overall_grade) if student.overall_grade is not None else SnapshotFormat.NO_GRADE
+        grades.append(grade)
+        if grade != SnapshotFormat.NO_GRADE:
+            grade_counts[grade] += 1
+            pass_count += 1 if student.passes_course() else 0
+        subjects = student.subjects[:slots]
+        subject_counts.append(len(subjects))
+        for slot, subject in enumerate(subjects):
+            subject_ids[row * slots + slot] = int(subject.id)
+            subject_marks[row * slots + slot] = subject.mark
+        for text in (student.name, student.email, student._password):
+            strings += text.encode('utf-8')
+            string_offsets.append(len(strings))
+    email_order = sorted(range(len(students)), key=lambda row: SnapshotFormat.email_hash(students[row].email))
+    email_hashes = array('Q', (SnapshotFormat.email_hash(students[row].email) for row in email_order))
+    email_rows = array('I', email_order)
+
+    sections = [ids.tobytes(), marks.tobytes(), bytes(grades), subject_counts.tobytes(), subject_ids.tobytes(),
+                bytes(subject_marks), string_offsets.tobytes(), bytes(strings), email_hashes.tobytes(), email_rows.tobytes()]
+    offsets = []
+    position = SnapshotFormat.HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+    temp_name = file_name + ".tmp"
+    with open(temp_name, 'wb') as file:
+        file.write(SnapshotFormat.HEADER.pack(SnapshotFormat.MAGIC, SnapshotFormat.VERSION, slots, len(students),
+                                              *grade_counts, pass_count, *offsets))
+        for offset, section in zip(offsets, sections):
+            file.write(bytes(offset - file.tell()))
+            file.write(section)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_name, file_name)
+    # the grade column and pass count were computed under the source's scheme
+    db.grading.save(file_name + ".grading")
+    return len(students)
+
+
+# Student whose fields are read straight out of the mapped snapshot on access
+class SnapshotStudent(Student):
+    __slots__ = ("_snapshot", "_row")
+
+    def __init__(self, snapshot: 'SnapshotDatabase', row: int) -> None:
+        self._snapshot = snapshot
+        self._row = row
+
+    def _string(self, field: int) -> str:
+        offsets = self._snapshot._columns["string_offsets"]
+        start, end = offsets[3 * self._row + field], offsets[3 * self._row + field + 1]
+        return str(self._snapshot._columns["strings"][start:end], 'utf-8')
+
+    @property
+    def id(self) -> str:
+        return str(self._snapshot._columns["ids"][self._row]).zfill(6)
+
+    @property
+    def _name(self) -> str:
+        return self._string(0)
+
+    @property
+    def _email(self) -> str:
+        return self._string(1)
+
+    @property
+    def _password(self) -> str:
+        return self._string(2)
+
+    @property
+    def _subjects(self) -> dict[str, Subject]:
+        columns, slots = self._snapshot._columns, self._snapshot.max_subjects
+        first = self._row * slots
+        subjects = (Subject(str(columns["subject_ids"][slot]).zfill(3), columns["subject_marks"][slot])
+                    for slot in range(first, first + columns["subject_counts"][self._row]))
+        return {subject.id: subject for subject in subjects}
+
+    @property
+    def overall_mark(self) -> float:
+        mark = self._snapshot._columns["marks"][self._row]
+        return None if math.isnan(mark) else mark
+
+    @property
+    def overall_grade(self) -> str:
+        return self._snapshot._grade_of(self._row)
+
+    @property
+    def _observer(self) -> None:
+        return None
+
+    def _grading(self) -> GradingScheme:
+        return self._snapshot.grading
+
+    def can_enroll_subject(self) -> bool:
+        return False
+
+    def enroll_in_subject(self, subject: Subject) -> Subject:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def drop_subject(self, subject_id: str) -> None:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def change_password(self, new_password: str) -> None:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def set_password_hash(self, password_hash: str) -> None:
+        raise PermissionError("Snapshot databases are read-only")
+
+
+# Read-only Database over a memory-mapped snapshot. Lookups binary-search the
+# id and email-hash columns and reports scan the grade and mark columns
+# without decoding records.
+class SnapshotDatabase(Database):
+    READ_ONLY = True
+
+    def __init__(self, file_name: str = "students.snap") -> None:
+        super().__init__(file_name)
+
+    def _create_file_if_not_exists(self) -> None:
+        if not os.path.exists(self.FILE_NAME):
+            raise FileNotFoundError(f"Snapshot {self.FILE_NAME} does not exist")
+
+    def _load(self) -> None:
+        with open(self.FILE_NAME, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = SnapshotFormat.HEADER.unpack_from(self._mmap)
+        magic, version, self.max_subjects, self.count = header[:4]
+        if magic != SnapshotFormat.MAGIC or version != SnapshotFormat.VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.FILE_NAME} is not a student snapshot")
+        grade_total = len(Utils.GRADES)
+        self._grade_counts = dict(zip(Utils.GRADES, header[4:4 + grade_total]))
+        self._pass_count = header[4 + grade_total]
+        self._cohort_mean: tuple = None
+        offsets = header[5 + grade_total:]
+        ends = list(offsets[1:]) + [len(self._mmap)]
+        self._view = memoryview(self._mmap)
+        self._columns: dict[str, memoryview] = {}
+        for name, start, end in zip(SnapshotFormat.SECTIONS, offsets, ends):
+            self._columns[name] = self._view[start:end]
+        # trim the alignment padding off each column and give it its element type
+        slots = self.count * self.max_subjects
+        layout = {"ids": ('I', self.count), "marks": ('f', self.count), "grades": ('B', self.count),
+                  "subject_counts": ('H', self.count), "subject_ids": ('H', slots), "subject_marks": ('B', slots),
+                  "string_offsets": ('I', 3 * self.count + 1), "email_hashes": ('Q', self.count),
+                  "email_rows": ('I', self.count)}
+        for name, (format, items) in layout.items():
+            column = self._columns[name]
+            self._columns[name] = column[:items * struct.calcsize(format)].cast(format)
+            column.release()
+        strings = self._columns["strings"]
+        self._columns["strings"] = strings[:self._columns["string_offsets"][-1]]
+        strings.release()
+
+    def _grade_of(self, row: int) -> str:
+        code = self._columns["grades"][row]
+        return Utils.GRADES[code] if code != SnapshotFormat.NO_GRADE else None
+
+    @property
+    def students(self) -> list[Student]:
+        return [SnapshotStudent(self, row) for row in range(self.count)]
+
+    def find_student_by_id(self, id: str) -> Student:
+        if not id.isdigit():
+            return None
+        ids = self._columns["ids"]
+        row = bisect.bisect_left(ids, int(id))
+        return SnapshotStudent(self, row) if row < self.count and ids[row] == int(id) else None
+
+    def find_student_by_email(self, email: str) -> Student:
+        hashes, rows = self._columns["email_hashes"], self._columns["email_rows"]
+        key = SnapshotFormat.email_hash(email)
+        position = bisect.bisect_left(hashes, key)
+        while position < self.count and hashes[position] == key:
+            student = SnapshotStudent(self, rows[position])
+            if student.email == email:
+                return student
+            position += 1
+        return None
+
+    def group_by_grade(self) -> dict[str, list[Student]]:
+        grouped = {grade: [] for grade in Utils.GRADES}
+        for row, code in enumerate(self._columns["grades"]):
+            if code != SnapshotFormat.NO_GRADE:
+                grouped[Utils.GRADES[code]].append(SnapshotStudent(self, row))
+        return {grade: group for grade, group in grouped.items() if group}
+
+    def partition_by_result(self) -> dict[str, list[Student]]:
+        partitioned = {"PASS": [], "FAIL": []}
+        grades = self._columns["grades"]
+        for row, mark in enumerate(self._columns["marks"]):
+            if grades[row] != SnapshotFormat.NO_GRADE:
+                partitioned["PASS" if self.grading.passes(mark) else "FAIL"].append(SnapshotStudent(self, row))
+        return partitioned
+
+    def grade_count(self, grade: str) -> int:
+        return self._grade_counts.get(grade, 0)
+
+    def result_count(self, result: str) -> int:
+        graded = sum(self._grade_counts.values())
+        return {"PASS": self._pass_count, "FAIL": graded - self._pass_count}.get(result, 0)
+
+    # the snapshot never changes, so the mark column is summed once
+    def cohort_mean_mark(self) -> float:
+        if self._cohort_mean is None:
+            marks = [mark for mark in self._columns["marks"] if not math.isnan(mark)]
+            self._cohort_mean = (sum(marks) / len(marks) if marks else None,)
+        return self._cohort_mean[0]
+
+    def save(self) -> None:
+        pass
+
+    def close(self) -> None:
+        super().close()
+        for column in self._columns.values():
+            column.release()
+        self._view.release()
+        self._mmap.close()
+
+    def register_student(self, id: str, name: str, email: str, password: str) -> Student:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def remove_student(self, id: str) -> bool:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def clear(self) -> None:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def generate_unique_student_id(self) -> str:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def generate_unique_student_ids(self, count: int) -> list[str]:
+        raise PermissionError("Snapshot databases are read-only")
+
+    def regrade(self, cutoffs: tuple, pass_mark: float = None, dry_run: bool = False) -> dict[tuple[str, str], int]:
+        if not dry_run:
+            raise PermissionError("Snapshot databases are read-only")
+        return super().regrade(cutoffs, pass_mark, dry_run)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a memory-mappable snapshot of a students database")
+    parser.add_argument("source", nargs="?", default="students.data")
+    parser.add_argument("target", nargs="?", default="students.snap")
+    args = parser.parse_args()
+    print(f"{write_snapshot(Database(args.source), args.target)} students written to {args.target}")
@@ -0,0 +1,142 @@
+import sqlite3
+import weakref
+from common.id_allocator import IdAllocator
+from common.models import Database, ScanningReportsMixin, Student
+from common.grading import GradingScheme
+
+
+# grades are derived from marks, so reports are computed from the rows on demand
+class SqliteDatabase(ScanningReportsMixin, Database):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS students (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS students_email ON students (email);
+        CREATE TABLE IF NOT EXISTS subjects (
+            student_id TEXT NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+            id TEXT NOT NULL,
+            mark INTEGER NOT NULL,
+            grade TEXT NOT NULL,
+            PRIMARY KEY (student_id, id)
+        );
+    """
+
+    def __init__(self, file_name: str = "students.db", randomize_ids: bool = True) -> None:
+        super().__init__(file_name, randomize_ids=randomize_ids)
+
+    def _create_file_if_not_exists(self) -> None:
+        # the async services drive this database from their own worker thread; callers
+        # still use it from one thread at a time, which is all sqlite3 needs
+        self._connection = sqlite3.connect(self.FILE_NAME, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(SqliteDatabase.SCHEMA)
+        self._connection.commit()
+
+    def _load(self) -> None:
+        # identity map, so repeated lookups hand out the same Student object
+        self._cache: weakref.WeakValueDictionary[str, Student] = weakref.WeakValueDictionary()
+        self._id_allocator = IdAllocator.load(self.FILE_NAME + ".ids") or IdAllocator(randomize=self._randomize_ids)
+        self._verify_id_allocator([id for (id,) in self._connection.execute("SELECT id FROM students")])
+
+    def _materialize(self, row: tuple) -> Student:
+        id, name, email, password = row
+        student = self._cache.get(id)
+        if student is not None:
+            return student
+        subjects = self._connection.execute(
+            "SELECT id, mark FROM subjects WHERE student_id = ? ORDER BY rowid", (id,)).fetchall()
+        student = Student.from_record((id, name, email, password, subjects))
+        student._observer = self
+        self._cache[id] = student
+        return student
+
+    @property
+    def students(self) -> list[Student]:
+        rows = self._connection.execute("SELECT id, name, email, password FROM students ORDER BY rowid")
+        return [self._materialize(row) for row in rows.fetchall()]
+
+    def save(self) -> None:
+        self._connection.commit()
+        if self._id_allocator.dirty:
+            self._id_allocator.save(self.FILE_NAME + ".ids")
+
+    def checkpoint(self) -> None:
+        self.save()
+
+    def close(self) -> None:
+        super().close()
+        self._connection.close()
+
+    def student_changed(self, student: Student, op: str, **data) -> None:
+        if op == "enroll":
+            subject = student.find_enrolled_subject(data["subject"])
+            self._connection.execute(
+                "INSERT OR REPLACE INTO subjects (student_id, id, mark, grade) VALUES (?, ?, ?, ?)",
+                (student.id, subject.id, subject.mark, self.grading.grade(subject.mark)))
+        elif op == "drop":
+            self._connection.execute(
+                "DELETE FROM subjects WHERE student_id = ? AND id = ?", (student.id, data["subject"]))
+        elif op == "password":
+            self._connection.execute(
+                "UPDATE students SET password = ? WHERE id = ?", (data["password"], student.id))
+
+    # subject rows store their grade, so they are regraded along with the students
+    def _apply_grading(self, grading: GradingScheme) -> None:
+        super()._apply_grading(grading)
+        rows = self._connection.execute("SELECT student_id, id, mark FROM subjects").fetchall()
+        subject_grades = grading.grades([mark for _, _, mark in rows])
+        self._connection.executemany(
+            "UPDATE subjects SET grade = ? WHERE student_id = ? AND id = ?",
+            ((grade, student_id, id) for (student_id, id, _), grade in zip(rows, subject_grades)))
+
+    def clear(self) -> None:
+        for student in self._cache.values():
+            student._observer = None
+        self._cache.clear()
+        self._connection.execute("DELETE FROM students")
+        self._id_allocator = IdAllocator(randomize=self._randomize_ids)
+        self._notify_cleared()
+
+    def find_student_by_email(self, email: str) -> Student:
+        row = self._connection.execute(
+            "SELECT id, name, email, password FROM students WHERE email = ?", (email,)).fetchone()
+        return self._materialize(row) if row else None
+
+    def find_student_by_id(self, id: str) -> Student:
+        row = self._connection.execute(
+            "SELECT id, name, email, password FROM students WHERE id = ?", (id,)).fetchone()
+        return self._materialize(row) if row else None
+
+    def remove_student(self, id: str) -> bool:
+        deleted = self._connection.execute("DELETE FROM students WHERE id = ?", (id,)).rowcount
+        student = self._cache.pop(id, None)
+        if student is not None:
+            student._observer = None
+        if deleted > 0:
+            self._id_allocator.release(int(id))
+            self._notify_removed(id)
+        return deleted > 0
+
+    def register_student(self, id: str, name: str, email: str, password: str) -> Student:
+        self._connection.execute(
+            "INSERT INTO students (id, name, email, password) VALUES (?, ?, ?, ?)", (id, name, email, password))
+        self._id_allocator.reserve(int(id))
+        student = Student(id, name, email, password)
+        student._observer = self
+        self._cache[id] = student
+        return student
+
+    # copy an existing roster, e.g. a jsonpickle students.data, into this database
+    def import_students(self, students: list[Student]) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO students (id, name, email, password) VALUES (?, ?, ?, ?)",
+            ((s.id, s.name, s.email, s._password) for s in students))
+        for student in students:
+            self._id_allocator.reserve(int(student.id))
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO subjects (student_id, id, mark, grade) VALUES (?, ?, ?, ?)",
+            ((s.id, subject.id, subject.mark, self.grading.grade(subject.mark)) for s in students for subject in s.subjects))
+        self.save()
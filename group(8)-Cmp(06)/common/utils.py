@@ -1,9 +1,18 @@
+import bisect
 import re
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Utils:
     PASSWORD_PATTERN = r"^[A-Z][a-zA-Z]{5,}[0-9]{3,}$"
     EMAIL_PATTERN = r"^\w+\.\w+@university\.com$"
+    GRADES = ('HD', 'D', 'C', 'P', 'Z')
+    # lowest mark of every grade but the last, in GRADES order
+    GRADE_CUTOFFS = (85, 75, 65, 50)
+    _ascending_cutoffs = GRADE_CUTOFFS[::-1]
     
     @staticmethod
     def verify_password(password: str) -> bool:
@@ -13,16 +22,24 @@ class Utils:
     def verify_email(email: str) -> bool:
         return re.match(Utils.EMAIL_PATTERN, email)
 
+    @staticmethod
+    def _checked_cutoffs(cutoffs: tuple) -> tuple:
+        cutoffs = tuple(cutoffs)
+        if len(cutoffs) != len(Utils.GRADES) - 1 or any(high <= low for high, low in zip(cutoffs, cutoffs[1:])):
+            raise ValueError(f"Expected {len(Utils.GRADES) - 1} strictly descending grade cutoffs, got {cutoffs}")
+        return cutoffs
+
     @staticmethod
     def calculate_grade(mark: float) -> float:
         if mark is not None:
-            if mark >= 85:
-                return 'HD'
-            elif mark >= 75:
-                return 'D'
-            elif mark >= 65:
-                return 'C'
-            elif mark >= 50:
-                return 'P'
-            else:
-                return 'Z'
+            return Utils.GRADES[len(Utils.GRADE_CUTOFFS) - bisect.bisect_right(Utils._ascending_cutoffs, mark)]
+
+    # grades a whole column of marks at once: numpy.digitize when numpy is installed, bisect otherwise
+    @staticmethod
+    def calculate_grades(marks: list[float], cutoffs: tuple = None) -> list[str]:
+        ascending = Utils._ascending_cutoffs if cutoffs is None else Utils._checked_cutoffs(cutoffs)[::-1]
+        ascending_grades = Utils.GRADES[::-1]
+        if numpy is not None:
+            buckets = numpy.digitize(numpy.asarray(marks, dtype=float), ascending)
+            return [ascending_grades[bucket] for bucket in buckets.tolist()]
+        return [ascending_grades[bisect.bisect_right(ascending, mark)] for mark in marks]
@@ -11,7 +11,7 @@ from common.services import LoginService, StudentOperationsService
 class MainForm(tk.Tk):
     def __init__(self):
         super().__init__()
-        self.db = Database()
+        self.db = Database(shared=True)
         self.title("University System")
         self.configure(bg="#394867")
 
@@ -39,6 +39,7 @@ class MainForm(tk.Tk):
         self.load_login_form()
 
         self.selected_menu_index = tk.IntVar()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def clear_frame_contents(self, frame):
         for widget in frame.winfo_children():
@@ -107,6 +108,13 @@ class MainForm(tk.Tk):
         subjects_form = SubjectsForm(self.content_frame, self.logged_in_student)
         subjects_form.pack(fill="both", expand=False)
 
+    # persist anything the flush policy is still holding back before the window goes away
+    def on_close(self):
+        try:
+            self.db.close()
+        finally:
+            self.destroy()
+
     def log_out(self):
         if messagebox.askyesno("Log out", "Are you sure you want to log out?") == False:
             return
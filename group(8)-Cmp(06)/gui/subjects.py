@@ -20,4 +20,4 @@ class SubjectsForm(tk.Frame):
         self.tree.pack(pady=20)
 
         for subject in student.subjects:
-            self.tree.insert("", tk.END, values=(subject.id, subject.mark, subject.grade))
\ No newline at end of file
+            self.tree.insert("", tk.END, values=(subject.id, subject.mark, student.subject_grade(subject)))
\ No newline at end of file
@@ -0,0 +1,177 @@
+import hmac
+import re
+from common.models import Database, Student
+from common.operation_result import OperationResult, ResultStatus
+from common.services import AdminOperationsLogic, LoginService, RegisterService, SessionService, StudentOperationsService
+from common.sessions import SessionStore
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# JSON endpoints over the services. POST /login issues a session token that
+# student endpoints accept as "Authorization: Bearer <token>"; without one they
+# fall back to the email and password in the request body. Every handler takes
+# the decoded body, the path parameters and the token, and returns
+# (HTTP status, JSON-ready payload). The /admin endpoints take the server's
+# admin token as their bearer token and are disabled when no admin token is set.
+class StudentApi:
+    STATUS_CODES = {
+        ResultStatus.PASSWORD_MISMATCH: 400,
+        ResultStatus.INVALID_CREDENTIALS: 400,
+        ResultStatus.INCORRECT_PASSWORD: 401,
+        ResultStatus.INVALID_SESSION: 401,
+        ResultStatus.STUDENT_NOT_FOUND: 404,
+        ResultStatus.F_STUDENT_NOT_FOUND: 404,
+        ResultStatus.SUBJECT_NOT_FOUND: 404,
+        ResultStatus.STUDENT_ALREADY_EXISTS: 409,
+        ResultStatus.ENROLL_LIMIT_REACHED: 409,
+        ResultStatus.STUDENT_IDS_EXHAUSTED: 503,
+    }
+
+    def __init__(self, db: Database, sessions: SessionStore = None, admin_token: str = None) -> None:
+        self.db = db
+        self.admin_token = admin_token
+        self.session_service = SessionService(db, sessions or SessionStore(db))
+        self.login_service = LoginService(db)
+        self.register_service = RegisterService(db)
+        self.admin_service = AdminOperationsLogic(db)
+        self.routes = [
+            ("POST", "/login", self.login),
+            ("POST", "/logout", self.logout),
+            ("POST", "/register", self.register),
+            ("POST", "/enroll", self.enroll),
+            ("POST", "/drop", self.drop),
+            ("POST", "/password", self.change_password),
+            ("GET", "/admin/students", self.admin(self.list_students)),
+            ("DELETE", "/admin/students/{id}", self.admin(self.remove_student)),
+            ("GET", "/admin/grades", self.admin(self.group_by_grade)),
+            ("GET", "/admin/partition", self.admin(self.partition)),
+            ("GET", "/admin/summary", self.admin(self.summary)),
+        ]
+        self._patterns = [(method, re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path) + "$"), path, handler)
+                          for method, path, handler in self.routes]
+
+    # returns the route template (used to label latency), the handler and its path parameters
+    def resolve(self, method: str, path: str):
+        allowed = False
+        for route_method, pattern, template, handler in self._patterns:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return f"{method} {template}", handler, match.groupdict()
+                allowed = True
+        raise ApiError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+
+    @staticmethod
+    def student_json(student: Student) -> dict:
+        return {"id": student.id, "name": student.name, "email": student.email,
+                "overall_mark": student.overall_mark, "overall_grade": student.overall_grade,
+                "subjects": [{"id": subject.id, "mark": subject.mark, "grade": student.subject_grade(subject)}
+                             for subject in student.subjects]}
+
+    @staticmethod
+    def failure(result: OperationResult) -> ApiError:
+        status = result.status
+        if status == ResultStatus.ENROLL_LIMIT_REACHED:
+            message = status.value.format(Student.MAX_SUBJECTS)
+        elif result.data is not None:
+            message = status.value.format(result.data.name if isinstance(result.data, Student) else result.data)
+        else:
+            message = status.value
+        return ApiError(StudentApi.STATUS_CODES.get(status, 400), message)
+
+    @staticmethod
+    def field(body: dict, name: str) -> str:
+        value = body.get(name)
+        if not isinstance(value, str):
+            raise ApiError(400, f"'{name}' is required")
+        return value
+
+    def admin(self, handler):
+        def guarded(body: dict, params: dict, token: str):
+            if self.admin_token is None:
+                raise ApiError(403, "Admin endpoints are disabled on this server")
+            if token is None or not hmac.compare_digest(token.encode('utf-8'), self.admin_token.encode('utf-8')):
+                raise ApiError(401, "Admin token required")
+            return handler(body, params, token)
+        return guarded
+
+    def authenticate(self, body: dict, token: str) -> Student:
+        if token is not None:
+            result = self.session_service.resolve(token)
+        else:
+            result = self.login_service.login_student(self.field(body, "email"), self.field(body, "password"))
+        if not result.success:
+            raise StudentApi.failure(result)
+        return result.data
+
+    def login(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        result = self.session_service.login(self.field(body, "email"), self.field(body, "password"))
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, {"token": result.data, "student": self.student_json(self.session_service.resolve(result.data).data)}
+
+    def logout(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        result = self.session_service.logout(token)
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, {}
+
+    def register(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        name, email, password = self.field(body, "name"), self.field(body, "email"), self.field(body, "password")
+        result = self.register_service.ensure_student_doesnot_exist(email, password)
+        if result.success:
+            result = self.register_service.register_student(name, email, password)
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 201, self.student_json(result.data)
+
+    def enroll(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        student = self.authenticate(body, token)
+        result = StudentOperationsService(student, self.db).enroll_in_subject()
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, {"id": result.data.id, "mark": result.data.mark, "grade": student.subject_grade(result.data)}
+
+    def drop(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        student = self.authenticate(body, token)
+        result = StudentOperationsService(student, self.db).drop_subject(self.field(body, "subject_id"))
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, self.student_json(student)
+
+    def change_password(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        student = self.authenticate(body, token)
+        result = StudentOperationsService(student, self.db).change_password(
+            self.field(body, "new_password"), self.field(body, "confirm_password"))
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, {}
+
+    def list_students(self, body: dict, params: dict, token: str) -> tuple[int, list]:
+        with self.db.reading():
+            return 200, [self.student_json(student) for student in self.db.students]
+
+    def remove_student(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        result = self.admin_service.remove_student(params["id"])
+        if not result.success:
+            raise StudentApi.failure(result)
+        return 200, {}
+
+    def group_by_grade(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        return 200, {grade: [self.student_json(student) for student in group]
+                     for grade, group in self.admin_service.group_students_by_grade().items()}
+
+    def partition(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        return 200, {result: [self.student_json(student) for student in group]
+                     for result, group in self.admin_service.partition_students().items()}
+
+    def summary(self, body: dict, params: dict, token: str) -> tuple[int, dict]:
+        return 200, {"grades": self.admin_service.count_students_by_grade(),
+                     "cohort_mean_mark": self.admin_service.cohort_mean_mark(),
+                     "pass_rate": self.admin_service.pass_rate()}
@@ -0,0 +1,40 @@
+import threading
+from collections import deque
+
+
+# Per-endpoint request counts and latencies. Percentiles come from the most recent
+# SAMPLES requests of each endpoint, so memory stays bounded under load.
+class LatencyStats:
+    SAMPLES = 10_000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, dict] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {"count": 0, "total": 0.0, "max": 0.0,
+                                                     "samples": deque(maxlen=LatencyStats.SAMPLES)}
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["samples"].append(seconds)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            endpoints = {endpoint: (stats["count"], stats["total"], stats["max"], sorted(stats["samples"]))
+                         for endpoint, stats in self._endpoints.items()}
+        report = {}
+        for endpoint, (count, total, maximum, samples) in endpoints.items():
+            report[endpoint] = {"count": count, "mean_ms": round(1000 * total / count, 3),
+                                "p50_ms": LatencyStats._percentile_ms(samples, 0.50),
+                                "p95_ms": LatencyStats._percentile_ms(samples, 0.95),
+                                "p99_ms": LatencyStats._percentile_ms(samples, 0.99),
+                                "max_ms": round(1000 * maximum, 3)}
+        return report
+
+    @staticmethod
+    def _percentile_ms(samples: list[float], fraction: float) -> float:
+        return round(1000 * samples[min(len(samples) - 1, int(fraction * len(samples)))], 3)
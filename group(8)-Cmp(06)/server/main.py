@@ -0,0 +1,136 @@
+import sys, os; sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path else None
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from common.flush_policy import FlushPolicy
+from common.models import Database
+from server.api import ApiError, StudentApi
+from server.latency import LatencyStats
+
+
+class StudentRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response sets Content-Length
+    protocol_version = "HTTP/1.1"
+    # headers and body go out as separate writes; without TCP_NODELAY the second
+    # waits on the client's delayed ACK
+    disable_nagle_algorithm = True
+    MAX_BODY_BYTES = 1 << 20
+    server: 'StudentServer'
+
+    def do_GET(self) -> None:
+        self.handle_request()
+
+    def do_POST(self) -> None:
+        self.handle_request()
+
+    def do_DELETE(self) -> None:
+        self.handle_request()
+
+    def handle_request(self) -> None:
+        start = time.perf_counter()
+        endpoint = f"{self.command} (unrouted)"
+        try:
+            # the body is read before routing, so an error response never leaves its
+            # bytes on a keep-alive connection to be parsed as the next request
+            data = self.read_body_bytes()
+            path = self.path.split("?", 1)[0]
+            if self.command == "GET" and path == "/metrics":
+                endpoint = "GET /metrics"
+                status, payload = 200, self.server.latency.snapshot()
+            else:
+                endpoint, handler, params = self.server.api.resolve(self.command, path)
+                status, payload = handler(self.decode_body(data), params, self.bearer_token())
+        except ApiError as error:
+            status, payload = error.status, {"error": error.message}
+        except Exception as error:
+            status, payload = 500, {"error": f"An unexpected error occurred: {error}"}
+        self.send_json(status, payload)
+        self.server.latency.record(endpoint, time.perf_counter() - start)
+
+    def bearer_token(self) -> str:
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+
+    # a body whose length cannot be trusted is not read at all; the connection is
+    # closed after the response instead
+    def read_body_bytes(self) -> bytes:
+        if self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            raise ApiError(411, "Request body needs a Content-Length")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ApiError(400, "Invalid Content-Length")
+        if length > StudentRequestHandler.MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ApiError(413, "Request body is too large")
+        data = self.rfile.read(length) if length else b""
+        if len(data) < length:
+            self.close_connection = True
+            raise ApiError(400, "Request body is incomplete")
+        return data
+
+    @staticmethod
+    def decode_body(data: bytes) -> dict:
+        if not data:
+            return {}
+        try:
+            body = json.loads(data)
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def send_json(self, status: int, payload) -> None:
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class StudentServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], db: Database, admin_token: str = None) -> None:
+        super().__init__(address, StudentRequestHandler)
+        self.db = db
+        self.api = StudentApi(db, admin_token=admin_token)
+        self.latency = LatencyStats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the student system over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default="students.data")
+    parser.add_argument("--flush-ms", type=int, default=100, help="coalesce saves over this many milliseconds")
+    parser.add_argument("--admin-token", default=os.environ.get("UNISYS_ADMIN_TOKEN"),
+                        help="bearer token for the /admin endpoints (default $UNISYS_ADMIN_TOKEN); "
+                             "without one they are disabled")
+    args = parser.parse_args()
+    db = Database(args.db, flush_policy=FlushPolicy.EVERY_T_MILLISECONDS(args.flush_ms), concurrent=True)
+    server = StudentServer((args.host, args.port), db, args.admin_token)
+    print(f"Serving on http://{args.host}:{server.server_port} (latency report at /metrics)")
+    if args.admin_token is None:
+        print("Admin endpoints are disabled; pass --admin-token to enable them")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        server.server_close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
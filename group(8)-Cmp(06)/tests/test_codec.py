@@ -0,0 +1,78 @@
+import jsonpickle
+from common.codec import StudentCodec, migrate
+from common.lazy_storage import LazyDatabase
+from common.models import Database, Student, Subject
+
+
+def make_student(id: str = "000042") -> Student:
+    student = Student(id, "Ann Lee", "ann.lee@university.com", "Password123")
+    student.enroll_in_subject(Subject("007", 81))
+    student.enroll_in_subject(Subject("120", 47))
+    return student
+
+
+def test_record_round_trip():
+    student = make_student()
+    decoded = Student.from_record(StudentCodec.decode(StudentCodec.encode(student.to_record())))
+    assert decoded.to_record() == student.to_record()
+    assert decoded.overall_mark == student.overall_mark == 64
+    assert decoded.overall_grade == "P"
+
+
+def test_non_ascii_and_quotes_survive():
+    student = Student("000001", 'Zoë "Z" Ångström', "zoe.a@university.com", "Pässword123")
+    line = StudentCodec.encode(student.to_record())
+    assert line.endswith("\n") and line.count("\n") == 1
+    assert Student.from_record(StudentCodec.decode(line)).to_record() == student.to_record()
+
+
+def test_database_save_and_reload(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    db = Database(file_name)
+    db.register_student("000042", "Ann Lee", "ann.lee@university.com", "Password123")
+    db.find_student_by_id("000042").enroll_in_subject(Subject("007", 81))
+    db.save()
+    with open(file_name, encoding="utf-8") as file:
+        assert StudentCodec.is_header(file.readline())
+    reloaded = Database(file_name)
+    assert [student.to_record() for student in reloaded.students] == [student.to_record() for student in db.students]
+
+
+def test_legacy_jsonpickle_file_is_read_and_migrated(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    with open(file_name, "w") as file:
+        file.write(jsonpickle.encode([make_student(), make_student("000043")]))
+    db = Database(file_name)
+    assert [student.id for student in db.students] == ["000042", "000043"]
+    assert [subject.id for subject in db.find_student_by_id("000043").subjects] == ["007", "120"]
+    # the first save rewrites the file in the line format
+    db.save()
+    assert migrate(file_name) is False
+    assert [student.to_record() for student in Database(file_name).students] == \
+        [student.to_record() for student in db.students]
+
+
+def test_legacy_subjects_without_type_tags(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    with open(file_name, "w") as file:
+        file.write('[{"py/object": "common.models.Student", "id": "000007", "_name": "Bo", '
+                   '"_email": "bo.b@university.com", "_password": "Password123", '
+                   '"_subjects": [{"id": "001", "_mark": 90, "_grade": "HD"}], '
+                   '"overall_mark": 90.0, "overall_grade": "HD"}]')
+    assert migrate(file_name) is True
+    assert StudentCodec.decode(open(file_name, encoding="utf-8").readlines()[1]) == \
+        ["000007", "Bo", "bo.b@university.com", "Password123", [["001", 90]]]
+
+
+def test_last_record_without_newline(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    first, second = make_student("000042"), make_student("000043")
+    for database in (Database, LazyDatabase):
+        with open(file_name, "w", encoding="utf-8") as file:
+            file.write(StudentCodec.HEADER + StudentCodec.encode(first.to_record()) +
+                       StudentCodec.encode(second.to_record()).rstrip("\n"))
+        db = database(file_name)
+        db.register_student("000044", "Cy Moe", "cy.moe@university.com", "Password123")
+        db.save()
+        assert [student.to_record() for student in Database(file_name).students] == \
+            [first.to_record(), second.to_record(), db.find_student_by_id("000044").to_record()]
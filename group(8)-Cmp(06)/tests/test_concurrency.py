@@ -0,0 +1,73 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from common.models import Database
+from common.passwords import PasswordHasher
+from common.roster_generator import write_roster
+from common.services import AdminOperationsLogic, LoginService, RegisterService, StudentOperationsService
+
+
+@pytest.fixture(autouse=True)
+def cheap_kdf(monkeypatch):
+    monkeypatch.setattr(PasswordHasher, "N", 2 ** 4)
+
+
+def assert_indexes_consistent(db: Database) -> None:
+    students = db.students
+    assert len(students) == len(db._students_by_id)
+    for student in students:
+        assert db._students_by_id[student.id] is student
+        assert db._students_by_email[student.email] is student
+        assert len(student.subjects) <= student.MAX_SUBJECTS
+        assert len({subject.id for subject in student.subjects}) == len(student.subjects)
+    graded = [student for student in students if student.overall_grade is not None]
+    assert sum(db.grade_histogram().values()) == len(graded)
+    assert db.result_count("PASS") == sum(1 for student in graded if student.passes_course())
+    if graded:
+        assert db.cohort_mean_mark() == pytest.approx(sum(student.overall_mark for student in graded) / len(graded))
+
+
+def test_indexes_stay_consistent_under_concurrent_operations(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    write_roster(file_name, 200, seed=1)
+    db = Database(file_name, concurrent=True)
+    credentials = [(student.email, student._password) for student in db.students]
+    login_service = LoginService(db)
+    admin = AdminOperationsLogic(db)
+
+    def operation(seed: int) -> None:
+        rng = random.Random(seed)
+        email, password = rng.choice(credentials)
+        kind = rng.choice(("enroll", "drop", "remove", "report"))
+        if kind == "report":
+            admin.group_students_by_grade()
+            admin.cohort_mean_mark()
+            return
+        result = login_service.login_student(email, password)
+        if not result.success:
+            return
+        student = result.data
+        if kind == "enroll":
+            StudentOperationsService(student, db).enroll_in_subject()
+        elif kind == "drop" and student.subjects:
+            StudentOperationsService(student, db).drop_subject(rng.choice(student.subjects).id)
+        elif kind == "remove" and rng.random() < 0.1:
+            admin.remove_student(student.id)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(operation, range(1000)))
+    db.close()
+    assert_indexes_consistent(db)
+    assert_indexes_consistent(Database(file_name))
+
+
+def test_one_registration_wins_per_email(tmp_path):
+    db = Database(str(tmp_path / "students.data"), concurrent=True)
+    register_service = RegisterService(db)
+
+    def register(_) -> bool:
+        return register_service.register_student("Ann Lee", "ann.lee@university.com", "Password123").success
+
+    with ThreadPoolExecutor(8) as pool:
+        assert sum(pool.map(register, range(8))) == 1
+    assert len(db.students) == 1
@@ -0,0 +1,62 @@
+import pytest
+from common.id_allocator import IdAllocator, IdSpaceExhausted
+from common.models import Database
+
+
+def test_allocates_every_id_once_then_raises():
+    allocator = IdAllocator(capacity=50)
+    ids = [allocator.allocate() for _ in range(50)]
+    assert sorted(ids) == list(range(1, 51))
+    with pytest.raises(IdSpaceExhausted):
+        allocator.allocate()
+
+
+def test_released_ids_are_reused_after_exhaustion():
+    allocator = IdAllocator(capacity=10)
+    allocator.allocate_many(10)
+    allocator.release(4)
+    assert allocator.allocate() == 4
+    assert allocator.allocate_many(3) == []
+
+
+def test_allocate_many_stops_at_capacity():
+    allocator = IdAllocator(capacity=10)
+    allocator.reserve(3)
+    assert len(allocator.allocate_many(20)) == 9
+    assert allocator.count == 10
+
+
+def test_round_trips_through_its_sidecar(tmp_path):
+    file_name = str(tmp_path / "students.data.ids")
+    allocator = IdAllocator(capacity=1000)
+    issued = allocator.allocate_many(10)
+    allocator.release(issued[0])
+    allocator.save(file_name)
+    assert not allocator.dirty
+
+    loaded = IdAllocator.load(file_name)
+    assert loaded.count == 9 and not loaded.dirty
+    assert all(loaded.is_used(id) for id in issued[1:]) and not loaded.is_used(issued[0])
+    # the cursor carries on where the saved allocator stopped
+    assert loaded.allocate() == allocator.allocate()
+
+
+def test_missing_or_truncated_sidecar_is_ignored(tmp_path):
+    file_name = tmp_path / "students.data.ids"
+    assert IdAllocator.load(str(file_name)) is None
+    file_name.write_bytes(b"UIDS")
+    assert IdAllocator.load(str(file_name)) is None
+
+
+def test_stale_sidecar_is_rebuilt_from_the_data_file(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    db = Database(file_name)
+    ids = db.generate_unique_student_ids(3)
+    for number, id in enumerate(ids):
+        db.register_student(id, f"Stu Dent{number}", f"stu.dent{number}@university.com", "Password123")
+    db.save()
+    # a sidecar left behind by an older roster does not cover the ids on disk
+    IdAllocator(capacity=999999).save(file_name + ".ids")
+    reopened = Database(file_name)
+    assert all(reopened._id_allocator.is_used(int(id)) for id in ids)
+    assert reopened.generate_unique_student_id() not in ids
@@ -0,0 +1,60 @@
+from common.models import Database, Subject
+
+
+def snapshot_of(db: Database) -> list[tuple]:
+    return sorted(student.to_record() for student in db.students)
+
+
+def make_journaled_changes(file_name: str) -> Database:
+    db = Database(file_name, journal=True)
+    first = db.register_student("000001", "Ann Lee", "ann.lee@university.com", "Password123")
+    second = db.register_student("000002", "Bob Ray", "bob.ray@university.com", "Password123")
+    first.enroll_in_subject(Subject("001", 70))
+    first.enroll_in_subject(Subject("002", 90))
+    first.drop_subject("001")
+    second.enroll_in_subject(Subject("003", 40))
+    db.remove_student("000002")
+    db.register_student("000003", "Cy Dee", "cy.dee@university.com", "Password123")
+    db.save()
+    return db
+
+
+def test_replay_rebuilds_unsaved_snapshot(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    expected = snapshot_of(make_journaled_changes(file_name))
+    assert snapshot_of(Database(file_name, journal=True)) == expected
+
+
+def test_replay_over_snapshot_that_already_holds_the_changes(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    db = make_journaled_changes(file_name)
+    expected = snapshot_of(db)
+    # a crash between writing the snapshot and truncating the journal
+    db._write_snapshot()
+    assert snapshot_of(Database(file_name, journal=True)) == expected
+    assert snapshot_of(Database(file_name, journal=True)) == expected
+
+
+def test_checkpoint_truncates_the_journal(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    db = make_journaled_changes(file_name)
+    expected = snapshot_of(db)
+    db.checkpoint()
+    assert Database(file_name, journal=True)._journal.record_count == 0
+    assert snapshot_of(Database(file_name)) == expected
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    file_name = str(tmp_path / "students.data")
+    expected = snapshot_of(make_journaled_changes(file_name))
+    with open(file_name + ".journal", "a") as file:
+        file.write('{"op":"enroll","id":"000001","sub')
+    db = Database(file_name, journal=True)
+    assert snapshot_of(db) == expected
+    # records journaled after the torn line survive the next reopen
+    db.register_student("000004", "Di Eve", "di.eve@university.com", "Password123")
+    db.register_student("000005", "Ed Fox", "ed.fox@university.com", "Password123")
+    db.save()
+    reopened = Database(file_name, journal=True)
+    assert snapshot_of(reopened) == snapshot_of(db)
+    assert {"000004", "000005"} <= {student.id for student in reopened.students}